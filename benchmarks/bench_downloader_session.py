@@ -0,0 +1,75 @@
+"""Per-URL overhead of a fresh YoutubeDL per video vs a reused DownloaderSession.
+
+Serves a small mp4 from a local HTTP server and downloads it N times both ways,
+so the numbers cover yt-dlp start-up, extractor lookup and connection setup
+without touching TikTok.
+
+    python benchmarks/bench_downloader_session.py [N]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yt_dlp import YoutubeDL
+from collector.download_engine import YDL_OPTS, DownloaderSession
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # yt-dlp drops the connection after sniffing the first bytes
+
+
+def serve(directory):
+    handler = lambda *a, **kw: QuietHandler(*a, directory=directory, **kw)
+    server = QuietServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def per_url_instance(urls, out_folder):
+    for url in urls:
+        opts = dict(YDL_OPTS, noprogress=True, outtmpl=os.path.join(out_folder, YDL_OPTS['outtmpl']))
+        with YoutubeDL(opts) as ydl:
+            ydl.download([url])
+
+
+def shared_session(urls, out_folder):
+    with DownloaderSession(noprogress=True) as session:
+        for url in urls:
+            session.download(url, out_folder)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as src, tempfile.TemporaryDirectory() as dst:
+        for i in range(n):
+            with open(os.path.join(src, f'clip{i}.mp4'), 'wb') as f:
+                f.write(os.urandom(64 * 1024))
+        server = serve(src)
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        urls = [f'{base}/clip{i}.mp4' for i in range(n)]
+
+        for name, fn in (('per-URL YoutubeDL', per_url_instance), ('shared session', shared_session)):
+            out = os.path.join(dst, name.replace(' ', '_'))
+            os.makedirs(out)
+            start = time.perf_counter()
+            fn(urls, out)
+            elapsed = time.perf_counter() - start
+            print(f'{name:>18}: {elapsed:.3f}s total, {elapsed / n * 1000:.1f} ms/URL')
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
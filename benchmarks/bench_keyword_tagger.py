@@ -0,0 +1,59 @@
+"""Compiled keyword tagger vs the old per-tag substring scan.
+
+Builds a synthetic taxonomy of a few thousand terms (one- to three-word
+phrases) and 100k captions, then times KeywordTagger over every caption. The
+old `t in text.lower()` loop is timed on a sample and extrapolated, because
+running it over the full set takes minutes.
+
+    python benchmarks/bench_keyword_tagger.py [TERMS] [CAPTIONS]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector.keyword_tagger import KeywordTagger
+
+
+def word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def main():
+    n_terms = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    n_captions = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    rng = random.Random(42)
+    vocab = [word(rng) for _ in range(n_terms * 2)]
+    terms = list({' '.join(rng.sample(vocab, rng.choice((1, 1, 2, 3)))) for _ in range(n_terms)})
+    captions = [
+        ' '.join(rng.choice(vocab) for _ in range(rng.randint(8, 30))) + ' #fishing #carp'
+        for _ in range(n_captions)
+    ]
+
+    start = time.perf_counter()
+    tagger = KeywordTagger(terms)
+    compile_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = tagger.tag_many(captions)
+    tag_s = time.perf_counter() - start
+
+    sample = captions[:2000]
+    start = time.perf_counter()
+    for text in sample:
+        lowered = text.lower()
+        [t for t in terms if t in lowered]
+    naive_s = (time.perf_counter() - start) * len(captions) / len(sample)
+
+    hits = sum(1 for r in results if r)
+    print(f'{len(terms)} terms, {len(captions)} captions ({hits} with tags)')
+    print(f'  compile:            {compile_s:8.2f}s')
+    print(f'  KeywordTagger:      {tag_s:8.2f}s  ({len(captions) / tag_s:,.0f} captions/s)')
+    print(f'  substring scan est: {naive_s:8.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""PhashIndex lookups over a large synthetic library.
+
+Fills an index with random frame hashes for N videos, plants near duplicates
+(copies of existing videos with a few bits flipped per frame), then times
+indexing and one lookup per planted video and reports how many were found.
+Frame extraction with ffmpeg is not timed; it dominates per video and does
+not depend on library size.
+
+    python benchmarks/bench_phash.py [VIDEOS] [FRAMES] [QUERIES]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector.phash import PhashIndex, frame_hashes, SIZE
+
+
+def flip_bits(rng, hashes, bits):
+    out = hashes.copy()
+    for i in range(len(out)):
+        for b in rng.choice(64, bits, replace=False):
+            out[i] ^= np.uint64(1) << np.uint64(b)
+    return out
+
+
+def main():
+    n_videos = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    n_queries = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    rng = np.random.default_rng(42)
+    library = rng.integers(0, 2 ** 63, size=(n_videos, n_frames), dtype=np.uint64)
+
+    frames = rng.integers(0, 256, size=(1000, SIZE, SIZE), dtype=np.uint8)
+    start = time.perf_counter()
+    frame_hashes(frames)
+    hash_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = PhashIndex()
+    for vid, hashes in enumerate(library):
+        index.add(str(vid), hashes)
+    add_s = time.perf_counter() - start
+
+    originals = rng.choice(n_videos, n_queries, replace=False)
+    queries = [flip_bits(rng, library[o], 4) for o in originals]
+    start = time.perf_counter()
+    found = sum(1 for o, q in zip(originals, queries) if (index.match(q) or (None,))[0] == str(o))
+    query_s = time.perf_counter() - start
+
+    fresh = rng.integers(0, 2 ** 63, size=(n_queries, n_frames), dtype=np.uint64)
+    false_hits = sum(1 for q in fresh if index.match(q))
+
+    print(f'{n_videos} videos x {n_frames} frames, {n_queries} near duplicates')
+    print(f'  hash 1000 frames:  {hash_s * 1000:8.1f}ms')
+    print(f'  index:             {add_s:8.2f}s')
+    print(f'  lookup:            {query_s / n_queries * 1000:8.1f}ms each ({found}/{n_queries} found)')
+    print(f'  false matches:     {false_hits:8d} of {n_queries} unrelated clips')
+
+
+if __name__ == '__main__':
+    main()
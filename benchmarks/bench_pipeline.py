@@ -0,0 +1,193 @@
+"""Offline benchmark suite for the collector's hot paths.
+
+Everything runs locally: a synthetic export (synthetic_export.py), a fake
+yt-dlp and a fake OpenAI server with configurable latency (fakes.py), and a
+throwaway catalog. Timed steps:
+
+    scrape_cold / scrape_warm   ExportSource.collections() on a new / indexed export
+    history_save / history_load HistoryStore.add() for every id, then reopening it
+    catalog_insert              record_video() through the CatalogWriter
+    analytics_load / _compute   Analytics.load() on the large export, then every figure
+    end_to_end                  pipeline.run() over a smaller export
+
+Each run is appended to benchmarks/results.jsonl with the git commit it ran
+on and compared with the last result for the same parameters from another
+commit, so regressions show up as a ratio.
+
+    python benchmarks/bench_pipeline.py [--links 100000] [--e2e 300]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeOpenAI, install_fake_ytdlp
+from synthetic_export import write_export
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return git('rev-parse', '--short', 'HEAD') or 'unknown', bool(git('status', '--porcelain', '--untracked-files=no'))
+
+
+def timed(results, name, func, *args):
+    start = time.perf_counter()
+    value = func(*args)
+    results[name] = round(time.perf_counter() - start, 4)
+    return value
+
+
+def write_config(tmp, export_json, workers):
+    path = os.path.join(tmp, 'config.ini')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[DEFAULT]\n'
+                f'BASE_DIR = {os.path.join(tmp, "TikTok_Downloads")}\n'
+                f'CATALOG_DB = {os.path.join(tmp, "catalog.db")}\n'
+                f'HISTORY_FILE = {os.path.join(tmp, "download_history.json")}\n'
+                f'EXPORT_JSON = {export_json}\n'
+                f'DOWNLOAD_WORKERS = {workers}\n'
+                'DOWNLOAD_HOST_INTERVAL = 0\n'
+                'USE_AI = true\n')
+    return path
+
+
+def previous_result(path, params, commit):
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['params'] == params and record['commit'] != commit:
+                last = record
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline collector benchmarks.')
+    parser.add_argument('--links', type=int, default=100_000, help='links in the large export')
+    parser.add_argument('--e2e', type=int, default=300, help='links in the end-to-end export')
+    parser.add_argument('--download-latency', type=float, default=0.05, help='fake yt-dlp seconds per video')
+    parser.add_argument('--tag-latency', type=float, default=0.2, help='fake OpenAI seconds per request')
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--results', default=os.path.join(ROOT, 'benchmarks', 'results.jsonl'))
+    args = parser.parse_args()
+    params = {k: getattr(args, k) for k in ('links', 'e2e', 'download_latency', 'tag_latency', 'workers')}
+
+    fake_ai = FakeOpenAI(args.tag_latency)
+    install_fake_ytdlp(args.download_latency, jitter=0.2)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(OPENAI_API_KEY='bench', OPENAI_BASE_URL=fake_ai.url, LOCAL_TAGGER_FIRST='0',
+                          TAG_CACHE_DB=os.path.join(tmp, 'tag_cache.db'))
+        from collector.analytics import Analytics
+        from collector.catalog import CatalogWriter, connect, init_catalog, load_run_reports, record_video
+        from collector.config import Settings
+        from collector.history_store import HistoryStore
+        from collector.pipeline import run
+        from collector.sources import ExportSource
+
+        export = os.path.join(tmp, 'export.json')
+        timed(results, 'generate_export', write_export, export, args.links)
+        settings = Settings(write_config(tmp, export, args.workers))
+        init_catalog(settings.catalog_db).close()
+
+        source = ExportSource(settings)
+        collections = timed(results, 'scrape_cold', source.collections, None)
+        links = [url for urls in collections.values() for url in urls]
+        timed(results, 'scrape_warm', source.collections, None)
+        results['links_indexed'] = len(links)
+
+        ids = [f'{7_300_000_000_000_000_000 + i}' for i in range(args.links)]
+
+        def save_history():
+            writer = CatalogWriter(settings.catalog_db, settings.catalog_batch_size)
+            history = HistoryStore(settings.catalog_db, writer=writer)
+            for vid in ids:
+                history.add(vid, 'Export')
+            history.close()
+            writer.close()
+
+        def load_history():
+            history = HistoryStore(settings.catalog_db)
+            count = len(history)
+            history.close()
+            return count
+
+        def insert_catalog():
+            writer = CatalogWriter(settings.catalog_db, settings.catalog_batch_size)
+            for vid in ids:
+                record_video(writer, vid, 'Export', f'/videos/{vid}.mp4', f'clip {vid}', ['carp', 'bait'],
+                             'A synthetic clip.', '2025-01-01 00:00:00', url=f'https://www.tiktok.com/v/{vid}')
+            writer.close()
+
+        timed(results, 'history_save', save_history)
+        timed(results, 'history_load', load_history)
+        timed(results, 'catalog_insert', insert_catalog)
+
+        def compute_analytics(analytics):
+            for figure in (analytics.watches_per_day, analytics.watch_heatmap, analytics.repeat_watches,
+                           analytics.share_watch_ratio, analytics.tag_trends, analytics.priorities):
+                figure()
+
+        analytics = timed(results, 'analytics_load', Analytics.load, export, settings.catalog_db)
+        timed(results, 'analytics_compute', compute_analytics, analytics)
+        results['analytics_events'] = len(analytics.events)
+        del analytics
+
+        # End to end on a fresh catalog and a smaller export
+        e2e_tmp = os.path.join(tmp, 'e2e')
+        os.makedirs(e2e_tmp)
+        e2e_export = os.path.join(e2e_tmp, 'export.json')
+        write_export(e2e_export, args.e2e, seed=1)
+        e2e_settings = Settings(write_config(e2e_tmp, e2e_export, args.workers))
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            downloaded = timed(results, 'end_to_end', run, e2e_settings, ExportSource(e2e_settings))
+        conn = connect(e2e_settings.catalog_db)
+        report = load_run_reports(conn, 1)[0]
+        conn.close()
+        results['e2e_videos'] = downloaded
+        results['e2e_videos_per_min'] = report['videos_per_min']
+        results['e2e_stage_totals'] = {name: s['total_s'] for name, s in report['stages'].items()}
+        results['ai_requests'] = fake_ai.requests
+    fake_ai.close()
+
+    commit, dirty = git_commit()
+    record = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'params': params,
+        'results': results,
+    }
+    before = previous_result(args.results, params, commit)
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+    print(f"commit {commit}{' (dirty)' if dirty else ''}"
+          + (f", compared with {before['commit']}" if before else ''))
+    for name, value in results.items():
+        if isinstance(value, dict):
+            continue
+        line = f'  {name:<20} {value:>12}'
+        if before and isinstance(before['results'].get(name), (int, float)) and before['results'][name]:
+            line += f"   x{value / before['results'][name]:.2f}"
+        print(line)
+    print('  end-to-end stages (s): ' + ', '.join(
+        f'{name} {total:.2f}' for name, total in sorted(results['e2e_stage_totals'].items(), key=lambda kv: -kv[1])))
+
+
+if __name__ == '__main__':
+    main()
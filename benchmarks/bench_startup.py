@@ -0,0 +1,71 @@
+"""Start-up cost of the collector entry points.
+
+Each command runs in a fresh interpreter (best of N), from an empty working
+directory so nothing touches the real download tree or catalog. With
+--before REV the same tree at that git revision is exported and its entry
+scripts are imported for comparison (older scripts had no --help and did
+all their work at import time, so importing them is their start-up cost).
+
+    python benchmarks/bench_startup.py [--runs 5] [--before HEAD~1]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CURRENT = [
+    ('tiktok_collector.py --help', ['tiktok_collector.py', '--help']),
+    ('tiktok_official_api.py --help', ['tiktok_official_api.py', '--help']),
+    ('collector.catalog --help', ['-m', 'collector.catalog', '--help']),
+    ('import collector.pipeline', ['-c', 'import collector.pipeline']),
+    ('import yt_dlp (deferred)', ['-c', 'import yt_dlp']),
+]
+
+BEFORE = [
+    ('import tiktok_collector', ['-c', 'import tiktok_collector']),
+    ('import tiktok_official_api', ['-c', 'import tiktok_official_api']),
+]
+
+
+def best_of(root, args, runs):
+    env = dict(os.environ, PYTHONPATH=root)
+    best = None
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(runs):
+            argv = [sys.executable] + [os.path.join(root, a) if a.endswith('.py') else a for a in args]
+            start = time.perf_counter()
+            subprocess.run(argv, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def export_revision(rev, dest):
+    archive = subprocess.run(['git', 'archive', rev], cwd=ROOT, capture_output=True, check=True).stdout
+    subprocess.run(['tar', '-x', '-C', dest], input=archive, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--before', metavar='REV', help='git revision to compare against')
+    args = parser.parse_args()
+
+    baseline = best_of(ROOT, ['-c', 'pass'], args.runs)
+    print(f'{"bare interpreter":<34} {baseline * 1000:7.0f} ms')
+    if args.before:
+        with tempfile.TemporaryDirectory() as old_root:
+            export_revision(args.before, old_root)
+            for label, cmd in BEFORE:
+                if os.path.exists(os.path.join(old_root, cmd[1].split()[1] + '.py')):
+                    print(f'{args.before + ": " + label:<34} {best_of(old_root, cmd, args.runs) * 1000:7.0f} ms')
+    for label, cmd in CURRENT:
+        print(f'{label:<34} {best_of(ROOT, cmd, args.runs) * 1000:7.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Local stand-ins for yt-dlp and the OpenAI API, with configurable latency.
+
+install_fake_ytdlp() puts a fake `yt_dlp` module in sys.modules before the
+collector imports it, so DownloaderSession, verification and the content
+store all run for real on small, well-formed MP4 files. FakeOpenAI serves
+/chat/completions on localhost; point OPENAI_BASE_URL at its url.
+"""
+import json
+import os
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def mp4_bytes(vid, size):
+    """A minimal MP4 (ftyp, moov, mdat) of about size bytes, unique per vid."""
+    ftyp = struct.pack('>I4s', 16, b'ftyp') + b'isom' + b'\0\0\0\1'
+    moov = struct.pack('>I4s', 8 + 20, b'moov') + str(vid).encode().ljust(20, b'\0')
+    payload = max(0, size - len(ftyp) - len(moov) - 8)
+    mdat = struct.pack('>I4s', 8 + payload, b'mdat') + b'\0' * payload
+    return ftyp + moov + mdat
+
+
+class FakeYoutubeDL:
+    """Just enough of yt_dlp.YoutubeDL for DownloaderSession."""
+
+    latency = 0.0      # seconds per download
+    jitter = 0.0       # +/- fraction of latency
+    file_size = 64 * 1024
+
+    def __init__(self, params=None):
+        self.params = dict(params or {})
+
+    def prepare_filename(self, info):
+        return os.path.join(self.params.get('paths', {}).get('home', '.'),
+                            f"{info['uploader']} - {info['id']} - {info['title']}.{info['ext']}")
+
+    def extract_info(self, url, download=True):
+        vid = re.search(r'(\d{15,20})', url).group(1)
+        info = {'id': vid, 'uploader': 'bench', 'title': vid, 'ext': 'mp4', 'filesize': self.file_size}
+        if self.latency:
+            time.sleep(max(0.0, random.gauss(self.latency, self.latency * self.jitter)))
+        path = self.prepare_filename(info)
+        if download:
+            with open(path, 'wb') as f:
+                f.write(mp4_bytes(vid, self.file_size))
+        info['requested_downloads'] = [{'filepath': path, 'filesize': self.file_size}]
+        return info
+
+    def close(self):
+        pass
+
+
+def install_fake_ytdlp(latency=0.0, jitter=0.0, file_size=64 * 1024):
+    FakeYoutubeDL.latency = latency
+    FakeYoutubeDL.jitter = jitter
+    FakeYoutubeDL.file_size = file_size
+    module = types.ModuleType('yt_dlp')
+    module.YoutubeDL = FakeYoutubeDL
+    sys.modules['yt_dlp'] = module
+    return module
+
+
+class FakeOpenAI:
+    """Threaded /chat/completions server answering with canned fishing tags."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                prompt = body['messages'][0]['content']
+                m = re.search(r'Given (\d+) numbered', prompt)
+                item = {'tags': ['carp', 'bait'], 'title': 'Bench clip', 'summary': 'A synthetic clip.'}
+                answer = [item] * int(m.group(1)) if m else item
+                out = json.dumps({'choices': [{'message': {'content': json.dumps(answer)}}]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
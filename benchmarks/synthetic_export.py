@@ -0,0 +1,106 @@
+"""Synthetic TikTok "Download your data" exports for benchmarks.
+
+The file has the same nesting as a real export (Your Activity -> Watch
+History -> VideoList, Share History, Login History, Off TikTok Activity,
+Searches, ...). It mixes link shapes, repeat watches and non-video links
+in realistic proportions. Records are streamed to the file rather than
+built up as one JSON document, so exports with millions of links are
+quick to generate.
+
+    python benchmarks/synthetic_export.py out.json --links 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+# Share of links per section, roughly as in real exports
+SECTIONS = (
+    ('Watch History', 'VideoList', 0.90),
+    ('Share History', 'ShareHistoryList', 0.05),
+    ('Like List', 'ItemFavoriteList', 0.05),
+)
+
+
+def _link(rng, vid):
+    roll = rng.random()
+    if roll < 0.85:
+        return f'https://www.tiktokv.com/share/video/{vid}/'
+    if roll < 0.97:
+        return f'https://www.tiktok.com/@user{vid % 9973}/video/{vid}?lang=en'
+    if roll < 0.99:
+        return f'https://m.tiktok.com/v/{vid}.html'
+    return 'https://www.tiktok.com/foryou?lang=en-GB'
+
+
+def _records(rng, count, repeat_rate, start):
+    """Yield count {'Date', 'Link'} records, about repeat_rate of them rewatches."""
+    seen = []
+    stamp = start
+    for _ in range(count):
+        stamp += rng.randint(5, 600)
+        if seen and rng.random() < repeat_rate:
+            # Recently watched videos are the ones watched again
+            vid = seen[max(0, len(seen) - 1 - int(rng.expovariate(1 / 50)))]
+        else:
+            vid = 7_400_000_000_000_000_000 + rng.randrange(10 ** 17)
+            seen.append(vid)
+        yield {'Date': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(stamp)), 'Link': _link(rng, vid)}
+
+
+def _write_list(f, records):
+    f.write('[')
+    for i, record in enumerate(records):
+        if i:
+            f.write(',')
+        f.write(json.dumps(record))
+    f.write(']')
+
+
+def write_export(path, links=100_000, repeat_rate=0.3, seed=0, noise=0.1):
+    """
+    Write an export with `links` video links, of which about repeat_rate are
+    repeat watches of an earlier video. Returns the number of links written.
+    """
+    rng = random.Random(seed)
+    start = time.mktime((2024, 1, 1, 0, 0, 0, 0, 0, -1))
+    noise_count = int(links * noise)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"Your Activity": {')
+        f.write('"Activity Summary": {"ActivitySummaryMap": {"videosWatchedToTheEndSinceAccountRegistration": %d}}, '
+                % links)
+        f.write('"Login History": {"LoginHistoryList": ')
+        _write_list(f, ({'Date': '2025-01-01 00:00:00', 'IP': '10.0.0.%d' % (i % 255), 'DeviceModel': 'Pixel',
+                         'NetworkType': 'Wi-Fi'} for i in range(noise_count // 2)))
+        f.write('}, "Off TikTok Activity": {"OffTikTokActivityDataList": ')
+        _write_list(f, ({'TimeStamp': '2025-01-01 00:00:00', 'Source': 'shop', 'Event': 'view'}
+                        for _ in range(noise_count // 2)))
+        f.write('}, "Searches": {"SearchList": ')
+        _write_list(f, ({'Date': '2025-01-01 00:00:00', 'SearchTerm': 'carp %d' % i} for i in range(100)))
+        f.write('}')
+        for section, list_key, share in SECTIONS:
+            count = max(1, int(links * share))
+            f.write(f', {json.dumps(section)}: {{{json.dumps(list_key)}: ')
+            records = _records(rng, count, repeat_rate, start)
+            if section == 'Share History':
+                records = (dict(r, SharedContent='share_video', Method='copy') for r in records)
+            _write_list(f, records)
+            f.write('}')
+        f.write('}}')
+    return sum(max(1, int(links * share)) for _s, _k, share in SECTIONS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic TikTok export.')
+    parser.add_argument('path')
+    parser.add_argument('--links', type=int, default=100_000)
+    parser.add_argument('--repeat-rate', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    written = write_export(args.path, args.links, args.repeat_rate, args.seed)
+    print(f'Wrote {written} links to {args.path} in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
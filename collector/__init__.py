@@ -0,0 +1,8 @@
+"""TikTok Collector core: sources, the shared download pipeline and its helpers.
+
+Entry points live at the top level (tiktok_collector.py, tiktok_official_api.py);
+helper tools run as modules, e.g. `python -m collector.catalog search carp`.
+"""
+from .config import Settings
+
+__all__ = ['Settings']
@@ -0,0 +1,243 @@
+"""AI tagging utility specialized for fishing content taxonomy.
+Uses OpenAI to generate tags, a cleaned title, and a short summary.
+Set OPENAI_API_KEY as an environment variable before running.
+Set OPENAI_BASE_URL to point at any OpenAI-compatible server (e.g. a local stand-in).
+
+Model answers are cached on disk (TAG_CACHE_DB) keyed by input, MODEL and a
+fingerprint of the prompt and FISHING_TAGS, so re-runs cost nothing until
+one of those changes.
+
+The local keyword tagger runs first; with LOCAL_TAGGER_FIRST=1 (the default)
+OpenAI is only asked about videos it finds no tags for. Its results carry
+LOCAL_FINGERPRINT instead of TAG_FINGERPRINT, so retag can tell them apart.
+"""
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+import requests
+from .api_client import retry_after
+from .keyword_tagger import FISHING_SYNONYMS, default_tagger
+
+OPENAI_KEY = os.getenv('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1').rstrip('/')
+
+MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+LOCAL_TAGGER_FIRST = os.getenv('LOCAL_TAGGER_FIRST', '1') != '0'
+
+# Domain-specific taxonomy for fishing-related tags
+FISHING_TAGS = [
+    "carp", "match fishing", "float fishing", "ledgering", "feeder", "bait", "groundbait",
+    "rig", "zig rig", "hair rig", "hookbait", "boilie", "method feeder", "venue", "river",
+    "lake", "specimen", "coarse", "tackle", "rod setup", "reel", "line", "knot"
+]
+
+FIELDS = (
+    "- tags: up to 8 short tags chosen from common fishing taxonomy (e.g. carp, boilie, rig, method feeder),\n"
+    "- title: a concise cleaned title (max 60 chars) suitable for a video file name,\n"
+    "- summary: a 1-sentence summary of the video's core content.\n"
+    "Prefer tags from this list when relevant: " + ', '.join(FISHING_TAGS) + "\n"
+)
+
+SINGLE_PROMPT = (
+    "You are a metadata assistant specialized in fishing video content.\n"
+    "Given a TikTok video URL or caption, produce a JSON object with fields:\n"
+    "{fields}"
+    "Respond only with valid JSON. Input: {input}"
+)
+
+BATCH_PROMPT = (
+    "You are a metadata assistant specialized in fishing video content.\n"
+    "Given {count} numbered TikTok video URLs or captions, produce a JSON array "
+    "with one object per input, in the same order, each with fields:\n"
+    "{fields}"
+    "Respond only with valid JSON. Inputs:\n{inputs}"
+)
+
+# Identifies the model + prompts + taxonomy that produced a set of tags
+TAG_FINGERPRINT = hashlib.sha256(
+    json.dumps([MODEL, SINGLE_PROMPT, BATCH_PROMPT, FIELDS, FISHING_TAGS]).encode()
+).hexdigest()[:16] if OPENAI_KEY else 'heuristic'
+# Tags found by the local keyword tagger, keyed by the taxonomy it matched against
+LOCAL_FINGERPRINT = 'local:' + hashlib.sha256(
+    json.dumps([FISHING_TAGS, FISHING_SYNONYMS], sort_keys=True).encode()
+).hexdigest()[:8]
+
+TAG_CACHE_DB = os.getenv('TAG_CACHE_DB', 'tag_cache.db')
+TAG_CACHE_MAX_ENTRIES = int(os.getenv('TAG_CACHE_MAX_ENTRIES', '200000'))
+TAG_CACHE_MAX_AGE_DAYS = float(os.getenv('TAG_CACHE_MAX_AGE_DAYS', '365'))
+
+_session = requests.Session()
+
+
+class TagCache:
+    """SQLite-backed cache of tagging results with age and size eviction."""
+
+    def __init__(self, path, max_entries=TAG_CACHE_MAX_ENTRIES, max_age_days=TAG_CACHE_MAX_AGE_DAYS):
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS tag_cache (
+                key TEXT PRIMARY KEY,
+                result TEXT,
+                created_at REAL,
+                used_at REAL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_tag_cache_used ON tag_cache (used_at)')
+        self.evict()
+
+    @staticmethod
+    def key(caption_or_url):
+        return hashlib.sha256(f'{TAG_FINGERPRINT}\0{caption_or_url}'.encode()).hexdigest()
+
+    def get(self, caption_or_url):
+        k = self.key(caption_or_url)
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                'SELECT result FROM tag_cache WHERE key = ? AND created_at >= ?', (k, now - self.max_age)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE tag_cache SET used_at = ? WHERE key = ?', (now, k))
+        return tuple(json.loads(row[0]))
+
+    def put(self, caption_or_url, result):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO tag_cache (key, result, created_at, used_at) VALUES (?, ?, ?, ?)',
+                (self.key(caption_or_url), json.dumps(result), now, now),
+            )
+            self._puts += 1
+        if self._puts % 1000 == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop entries older than max_age, then the least recently used beyond max_entries."""
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM tag_cache WHERE created_at < ?', (time.time() - self.max_age,))
+            self.conn.execute(
+                'DELETE FROM tag_cache WHERE key IN ('
+                'SELECT key FROM tag_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            )
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TagCache(TAG_CACHE_DB)
+        return _cache
+
+
+class RateLimited(Exception):
+    """The API asked us to slow down (HTTP 429/503)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _chat(prompt, max_tokens=200):
+    """Send one chat completion request and return the reply text."""
+    resp = _session.post(
+        f'{OPENAI_BASE_URL}/chat/completions',
+        headers={'Authorization': f'Bearer {OPENAI_KEY}'},
+        json={
+            'model': MODEL,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'max_tokens': max_tokens,
+            'temperature': 0.2,
+        },
+        timeout=60,
+    )
+    if resp.status_code in (429, 503):
+        raise RateLimited(f'HTTP {resp.status_code}', retry_after(resp))
+    resp.raise_for_status()
+    return resp.json()['choices'][0]['message']['content']
+
+
+def _parse(item):
+    return (item.get('tags', []), item.get('title', 'untitled'), item.get('summary', ''))
+
+
+def _heuristic(caption_or_url):
+    # fallback heuristic tagging: find keywords in URL/caption
+    tags = default_tagger().tag(caption_or_url, limit=6)
+    return (tags, 'untitled', '')
+
+
+def tag_video(caption_or_url):
+    """Return (tags_list, title, summary)"""
+    return tag_videos([caption_or_url])[0][:3]
+
+
+def tag_videos(inputs):
+    """
+    Tag several videos with one request; returns a (tags, title, summary,
+    fingerprint) tuple per input, in order, where fingerprint is
+    LOCAL_FINGERPRINT for local keyword tagger answers and TAG_FINGERPRINT
+    otherwise. Inputs the local tagger or the cache can answer are not sent.
+    RateLimited propagates so callers can back off.
+    """
+    if not OPENAI_KEY:
+        return [_heuristic(x) + (TAG_FINGERPRINT,) for x in inputs]
+
+    results = [None] * len(inputs)
+    if LOCAL_TAGGER_FIRST:
+        for i, tags in enumerate(default_tagger().tag_many(inputs, limit=8)):
+            if tags:
+                results[i] = (tags, 'untitled', '', LOCAL_FINGERPRINT)
+
+    cache = get_cache()
+    for i, x in enumerate(inputs):
+        if results[i] is None:
+            cached = cache.get(x)
+            results[i] = cached + (TAG_FINGERPRINT,) if cached is not None else None
+    misses = [i for i, r in enumerate(results) if r is None]
+    if misses:
+        fresh = _request_tags([inputs[i] for i in misses])
+        for i, result in zip(misses, fresh):
+            if result is None:
+                result = ([], 'untitled', '')
+            else:
+                cache.put(inputs[i], result)
+            results[i] = result + (TAG_FINGERPRINT,)
+    return results
+
+
+def _request_tags(inputs):
+    """Ask the model; a result is None where the request or reply failed."""
+    if len(inputs) == 1:
+        prompt = SINGLE_PROMPT.format(fields=FIELDS, input=inputs[0])
+    else:
+        numbered = '\n'.join(f'{i + 1}. {x}' for i, x in enumerate(inputs))
+        prompt = BATCH_PROMPT.format(fields=FIELDS, count=len(inputs), inputs=numbered)
+
+    try:
+        parsed = json.loads(_chat(prompt, max_tokens=200 * len(inputs)))
+    except RateLimited:
+        raise
+    except Exception as e:
+        print('OpenAI error:', e)
+        return [None for _ in inputs]
+
+    if len(inputs) == 1:
+        return [_parse(parsed) if isinstance(parsed, dict) else None]
+    if isinstance(parsed, list) and len(parsed) == len(inputs) and all(isinstance(p, dict) for p in parsed):
+        return [_parse(p) for p in parsed]
+    # The model did not keep one answer per input; ask for each separately
+    return [r for x in inputs for r in _request_tags([x])]
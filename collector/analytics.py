@@ -0,0 +1,232 @@
+"""Viewing analytics over the data export and the catalog, with pandas.
+
+The export is streamed once into a columnar frame of every dated event
+(video id as int64, timestamp, section as a category). The catalog's
+downloaded ids and tag links are read into frames too, and every figure
+below is computed from those with vectorised pandas operations:
+
+    watches per day and per weekday/hour, repeat watches per video,
+    share vs watch ratio, tag trends per month, and download priorities
+    (the most watched and shared videos not downloaded yet).
+
+    python -m collector.analytics summary
+    python -m collector.analytics priorities -n 50 --save
+
+`priorities --save` stores the scores in the catalog's download_priority
+table; the pipeline then downloads the highest scoring videos first.
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from .catalog import init_catalog, save_priorities
+from .config import Settings
+from .export_reader import iter_export_links
+from .video_ids import ShortLinkCache, canonical_video_id
+
+WATCH = 'Watch History'
+SHARE = 'Share History'
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+# How much one event in each section adds to a video's download priority;
+# sections not listed count like a watch
+SECTION_WEIGHTS = {WATCH: 1.0, SHARE: 3.0, 'Like List': 2.0, 'Favorite Videos': 2.0}
+
+
+def load_events(export_path, short_links=None):
+    """
+    Every dated video event in the export as a frame with columns
+    vid (int64), date (datetime64) and section (category).
+    """
+    ids, dates, sections = [], [], []
+    known = {}
+
+    def extract_id(url):
+        # Rewatches repeat the same URL; resolve each one once
+        if url not in known:
+            vid = canonical_video_id(url, short_links)
+            known[url] = int(vid) if vid and vid.isdigit() else None
+        return known[url]
+
+    for vid, _url, date, section in iter_export_links(export_path, extract_id, dedupe=False):
+        ids.append(vid)
+        dates.append(date)
+        sections.append(section)
+    return pd.DataFrame({
+        'vid': np.array(ids, dtype=np.int64),
+        'date': pd.to_datetime(pd.Series(dates, dtype=object), format='%Y-%m-%d %H:%M:%S', errors='coerce'),
+        'section': pd.Categorical(sections),
+    })
+
+
+def _int_ids(frame, column='vid'):
+    frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    return frame.dropna(subset=[column]).astype({column: np.int64})
+
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+def load_catalog(conn):
+    """(downloaded ids, quarantined ids, video tags frame with vid and tag) from the catalog."""
+    sql = 'SELECT id AS vid FROM videos'
+    if _has_table(conn, 'history'):
+        sql += ' UNION SELECT id FROM history'
+    downloaded = _int_ids(pd.read_sql_query(sql, conn))['vid'].to_numpy()
+    quarantined = _int_ids(pd.read_sql_query(
+        'SELECT id AS vid FROM failures WHERE quarantined = 1', conn))['vid'].to_numpy()
+    tags = _int_ids(pd.read_sql_query(
+        'SELECT vt.video_id AS vid, t.name AS tag FROM video_tags vt JOIN tags t ON t.id = vt.tag_id', conn))
+    tags['tag'] = tags['tag'].astype('category')
+    return downloaded, quarantined, tags
+
+
+class Analytics:
+    """Figures over one export and catalog, loaded once and reused by every method."""
+
+    def __init__(self, events, downloaded=(), quarantined=(), video_tags=None):
+        self.events = events
+        self.downloaded = np.asarray(downloaded, dtype=np.int64)
+        self.quarantined = np.asarray(quarantined, dtype=np.int64)
+        self.video_tags = video_tags if video_tags is not None else pd.DataFrame({'vid': [], 'tag': []})
+        self.watches = events[events['section'] == WATCH]
+        self._counts = None
+
+    @classmethod
+    def load(cls, export_path, db_path):
+        conn = init_catalog(db_path)
+        short_links = ShortLinkCache(db_path, offline=True)
+        try:
+            events = load_events(export_path, short_links)
+            return cls(events, *load_catalog(conn))
+        finally:
+            short_links.close()
+            conn.close()
+
+    def watches_per_day(self):
+        """Watch events per calendar day."""
+        return self.watches['date'].dt.floor('D').value_counts().sort_index()
+
+    def watch_heatmap(self):
+        """Watch events per weekday (rows) and hour of day (columns)."""
+        dt = self.watches['date'].dt
+        table = pd.crosstab(dt.dayofweek, dt.hour)
+        table = table.reindex(index=range(7), columns=range(24), fill_value=0)
+        table.index = DAYS
+        return table
+
+    def video_counts(self):
+        """Per video: events in each section, watches, shares and when it was last seen."""
+        if self._counts is None:
+            counts = self.events.groupby(['vid', 'section'], observed=True).size().unstack(fill_value=0)
+            counts.columns = counts.columns.astype(str)
+            counts['watches'] = counts[WATCH] if WATCH in counts else 0
+            counts['shares'] = counts[SHARE] if SHARE in counts else 0
+            counts['last_seen'] = self.events.groupby('vid')['date'].max()
+            self._counts = counts
+        return self._counts
+
+    def repeat_watches(self, min_count=2):
+        """Watch count per video for videos watched at least min_count times, most first."""
+        counts = self.watches['vid'].value_counts()
+        return counts[counts >= min_count]
+
+    def share_watch_ratio(self):
+        """(overall shares per watch, per-video frame of watches, shares and ratio)."""
+        counts = self.video_counts()[['watches', 'shares']]
+        shared = counts[counts['shares'] > 0].copy()
+        shared['ratio'] = shared['shares'] / shared['watches'].replace(0, np.nan)
+        watches = counts['watches'].sum()
+        return (counts['shares'].sum() / watches if watches else 0.0), shared.sort_values('shares', ascending=False)
+
+    def tag_trends(self, freq='M', top=10):
+        """Watches per period of the top tags, from the catalog's tag links."""
+        watched = self.watches[['vid', 'date']].merge(self.video_tags, on='vid')
+        if watched.empty:
+            return pd.DataFrame()
+        table = watched.groupby([watched['date'].dt.to_period(freq), 'tag'], observed=True).size().unstack(fill_value=0)
+        return table[table.sum().nlargest(top).index]
+
+    def priorities(self, limit=None):
+        """
+        Videos not downloaded (or quarantined) yet, highest value first: the
+        sum of SECTION_WEIGHTS over their events, ties broken by most recent.
+        """
+        counts = self.video_counts()
+        sections = [c for c in counts.columns if c not in ('watches', 'shares', 'last_seen')]
+        weights = np.array([SECTION_WEIGHTS.get(s, 1.0) for s in sections])
+        todo = counts[~counts.index.isin(self.downloaded) & ~counts.index.isin(self.quarantined)]
+        ranked = todo[['watches', 'shares', 'last_seen']].assign(score=todo[sections].to_numpy() @ weights)
+        ranked = ranked.sort_values(['score', 'last_seen'], ascending=False)
+        return ranked if limit is None else ranked.head(limit)
+
+
+def summary(analytics, top=10):
+    events = analytics.events
+    print(f'{len(events)} events, {events["vid"].nunique()} distinct videos, '
+          f'{events["date"].min()} to {events["date"].max()}')
+    print(events['section'].value_counts().to_string())
+
+    per_day = analytics.watches_per_day()
+    if len(per_day):
+        print(f'\nWatches per day: mean {per_day.mean():.1f}, max {per_day.max()} on {per_day.idxmax():%Y-%m-%d}')
+        heatmap = analytics.watch_heatmap()
+        busiest = heatmap.stack().idxmax()
+        print(f'Busiest slot: {busiest[0]} {busiest[1]:02d}:00; watches per weekday and hour:')
+        print(heatmap.to_string())
+
+    repeats = analytics.repeat_watches()
+    print(f'\n{len(repeats)} video(s) watched more than once; most rewatched:')
+    print(repeats.head(top).to_string())
+
+    ratio, shared = analytics.share_watch_ratio()
+    print(f'\nShares per watch: {ratio:.3f} ({len(shared)} video(s) shared)')
+
+    trends = analytics.tag_trends(top=top)
+    if not trends.empty:
+        print('\nTag trends (watches per month):')
+        print(trends.tail(12).to_string())
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Viewing analytics from the data export and catalog.')
+    parser.add_argument('--export', default=settings.export_json)
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('summary', help='watch frequency, repeat watches, share ratio and tag trends')
+    cmd.add_argument('--top', type=int, default=10)
+    cmd = sub.add_parser('priorities', help='most watched videos not downloaded yet')
+    cmd.add_argument('-n', '--limit', type=int, default=20)
+    cmd.add_argument('--save', action='store_true', help='store the scores so runs download these first')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.export):
+        parser.error(f'export not found: {args.export}')
+    start = time.perf_counter()
+    analytics = Analytics.load(args.export, args.db)
+    print(f'Loaded {len(analytics.events)} events in {time.perf_counter() - start:.1f}s\n')
+
+    if args.command == 'summary':
+        summary(analytics, args.top)
+        return
+    ranked = analytics.priorities()
+    print(ranked.head(args.limit).to_string())
+    print(f'\n{len(ranked)} video(s) not downloaded yet')
+    if args.save:
+        # Single watches are the default order anyway; only keep videos that stand out
+        keep = ranked[ranked['score'] > 1]
+        conn = sqlite3.connect(args.db)
+        save_priorities(conn, zip(keep.index.astype(str), keep['score'].tolist(),
+                                  keep['watches'].tolist(), keep['shares'].tolist()))
+        conn.close()
+        print(f'Saved {len(keep)} priorities; the next run downloads these first')
+
+
+if __name__ == '__main__':
+    main()
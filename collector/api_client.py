@@ -0,0 +1,162 @@
+"""Shared HTTP client for the official TikTok API.
+
+One pooled requests.Session keeps connections alive between calls, a token
+bucket keeps the request rate within the app's quota, and transient failures
+(connection errors, 429 and 5xx) are retried with exponential backoff and
+jitter, honouring Retry-After when the server sends it. Every attempt's
+latency is recorded so a run can report how the API behaved.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class LatencyStats:
+    """Per-attempt latencies and outcomes, summarised at the end of a run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.statuses = {}
+        self.retries = 0
+
+    def record(self, seconds, status):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            statuses = dict(self.statuses)
+        if not latencies:
+            return {'requests': 0}
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            'requests': len(latencies),
+            'retries': self.retries,
+            'statuses': statuses,
+            'p50_ms': round(pct(0.5) * 1000, 1),
+            'p95_ms': round(pct(0.95) * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1),
+        }
+
+    def __str__(self):
+        s = self.summary()
+        if not s['requests']:
+            return 'no requests'
+        return (f"{s['requests']} request(s), {s['retries']} retried, "
+                f"p50 {s['p50_ms']:.0f} ms, p95 {s['p95_ms']:.0f} ms, max {s['max_ms']:.0f} ms")
+
+
+def retry_after(response):
+    """Seconds the server asked us to wait, or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ApiClient:
+    """
+    requests.Session wrapper with pooling, rate limiting and retries.
+
+    get()/post() return the final response after raise_for_status(), so
+    callers handle errors exactly as with bare requests calls. Pass retries=0
+    for requests that must not be repeated, such as redeeming a one-time code.
+    """
+
+    def __init__(self, requests_per_minute=60, burst=5, max_retries=5, backoff=1.0,
+                 max_backoff=60.0, timeout=30, pool_size=4):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.stats = LatencyStats()
+
+    def _delay(self, attempt, response=None):
+        delay = retry_after(response) if response is not None else None
+        if delay is None:
+            delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        return delay + random.uniform(0, delay / 2)
+
+    def request(self, method, url, retries=None, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        max_retries = self.max_retries if retries is None else retries
+        for attempt in range(max_retries + 1):
+            self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self.stats.record(time.perf_counter() - start, 'error')
+                if attempt == max_retries:
+                    raise
+                self.stats.retries += 1
+                time.sleep(self._delay(attempt))
+                continue
+            self.stats.record(time.perf_counter() - start, response.status_code)
+            if response.status_code in RETRY_STATUSES and attempt < max_retries:
+                self.stats.retries += 1
+                delay = self._delay(attempt, response)
+                print(f'API returned {response.status_code}, retrying in {delay:.1f}s')
+                response.close()
+                time.sleep(delay)
+                continue
+            response.raise_for_status()
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,471 @@
+"""SQLite catalog of downloaded videos.
+
+Writes go through a CatalogWriter: one thread owns the write connection and
+commits queued statements in batches, flushing by count or age, instead of
+one fsync per video. The database runs in WAL mode so readers never block
+the writer.
+
+Tags are normalised into tags/video_tags, and an FTS5 index over title,
+summary and tags (kept in sync by triggers) backs search_catalog() and the
+`python -m collector.catalog search ...` command.
+"""
+import argparse
+import json
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .config import Settings
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA temp_store=MEMORY',
+    # Lets INSERT OR REPLACE fire the delete trigger that keeps videos_fts in sync
+    'PRAGMA recursive_triggers=ON',
+)
+
+SCHEMA_VERSION = 3
+
+UPSERT_VIDEO = '''
+    INSERT INTO videos (id, collection, file_path, title, tags, summary, downloaded_at, url,
+                        file_size, sha256, verified_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        url = excluded.url,
+        file_size = excluded.file_size,
+        sha256 = excluded.sha256,
+        verified_at = excluded.verified_at,
+        collection = excluded.collection,
+        file_path = excluded.file_path,
+        title = excluded.title,
+        tags = excluded.tags,
+        summary = excluded.summary,
+        downloaded_at = excluded.downloaded_at
+'''
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def init_catalog(db_path):
+    conn = connect(db_path)
+    cur = conn.cursor()
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS videos (
+            id TEXT PRIMARY KEY,
+            collection TEXT,
+            file_path TEXT,
+            title TEXT,
+            tags TEXT,
+            summary TEXT,
+            downloaded_at TEXT
+        )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_videos_collection ON videos (collection)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_videos_downloaded_at ON videos (downloaded_at)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_videos_tags ON videos (tags)')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS video_tags (
+            video_id TEXT NOT NULL,
+            tag_id INTEGER NOT NULL,
+            PRIMARY KEY (video_id, tag_id)
+        ) WITHOUT ROWID
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_video_tags_tag ON video_tags (tag_id, video_id)')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source TEXT PRIMARY KEY,
+            newest_id TEXT,
+            newest_time INTEGER,
+            synced_at TEXT
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS run_reports (
+            id INTEGER PRIMARY KEY,
+            started_at TEXT,
+            source TEXT,
+            report TEXT
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS download_priority (
+            id TEXT PRIMARY KEY,
+            score REAL,
+            watches INTEGER,
+            shares INTEGER
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS video_phash (
+            id TEXT PRIMARY KEY,
+            hashes BLOB,
+            duplicate_of TEXT,
+            hashed_at TEXT
+        )
+    ''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_video_phash_duplicate_of ON video_phash (duplicate_of)')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS failures (
+            id TEXT PRIMARY KEY,
+            url TEXT,
+            collection TEXT,
+            error_class TEXT,
+            message TEXT,
+            attempts INTEGER,
+            first_failed_at REAL,
+            last_attempt_at REAL,
+            next_attempt_at REAL,
+            quarantined INTEGER DEFAULT 0
+        )
+    ''')
+    cur.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5 (
+            title, summary, tags,
+            content='videos', content_rowid='rowid', tokenize='porter unicode61'
+        )
+    ''')
+    cur.executescript('''
+        CREATE TRIGGER IF NOT EXISTS videos_fts_ai AFTER INSERT ON videos BEGIN
+            INSERT INTO videos_fts (rowid, title, summary, tags)
+            VALUES (new.rowid, new.title, new.summary, new.tags);
+        END;
+        CREATE TRIGGER IF NOT EXISTS videos_fts_ad AFTER DELETE ON videos BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, title, summary, tags)
+            VALUES ('delete', old.rowid, old.title, old.summary, old.tags);
+        END;
+        CREATE TRIGGER IF NOT EXISTS videos_fts_au AFTER UPDATE ON videos BEGIN
+            INSERT INTO videos_fts (videos_fts, rowid, title, summary, tags)
+            VALUES ('delete', old.rowid, old.title, old.summary, old.tags);
+            INSERT INTO videos_fts (rowid, title, summary, tags)
+            VALUES (new.rowid, new.title, new.summary, new.tags);
+        END;
+    ''')
+    conn.commit()
+    _migrate(conn)
+    return conn
+
+
+def _migrate(conn):
+    """Bring catalogs written by older versions up to SCHEMA_VERSION."""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version < 1:
+        # Split the old comma-joined tags column into tags/video_tags and
+        # index the rows that existed before videos_fts did.
+        with conn:
+            for vid, tags in conn.execute("SELECT id, tags FROM videos WHERE tags != ''").fetchall():
+                for sql, params in _tag_statements(vid, split_tags(tags)):
+                    conn.execute(sql, params)
+            conn.execute("INSERT INTO videos_fts (videos_fts) VALUES ('rebuild')")
+    if version < 2:
+        # Source URL (for re-tagging) and the prompt/model fingerprint the
+        # current tags were produced with.
+        with conn:
+            conn.execute('ALTER TABLE videos ADD COLUMN url TEXT')
+            conn.execute('ALTER TABLE videos ADD COLUMN tag_fingerprint TEXT')
+    if version < 3:
+        # Integrity check results for the downloaded file
+        with conn:
+            conn.execute('ALTER TABLE videos ADD COLUMN file_size INTEGER')
+            conn.execute('ALTER TABLE videos ADD COLUMN sha256 TEXT')
+            conn.execute('ALTER TABLE videos ADD COLUMN verified_at TEXT')
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+
+def split_tags(tags):
+    names = tags.split(',') if isinstance(tags, str) else tags
+    return list(dict.fromkeys(t.strip().lower() for t in names if t and t.strip()))
+
+
+def _tag_statements(vid, tags):
+    yield 'DELETE FROM video_tags WHERE video_id = ?', (vid,)
+    for name in tags:
+        yield 'INSERT OR IGNORE INTO tags (name) VALUES (?)', (name,)
+        yield 'INSERT OR IGNORE INTO video_tags (video_id, tag_id) SELECT ?, id FROM tags WHERE name = ?', (vid, name)
+
+
+def record_video(writer, vid, collection, file_path, title, tags, summary, downloaded_at, url=None,
+                 file_size=None, sha256=None, verified_at=None):
+    """Queue one video's row and tag links on the writer as a single unit."""
+    tags = split_tags(tags)
+    with writer.group():
+        writer.execute(UPSERT_VIDEO, (vid, collection, file_path, title, ','.join(tags), summary, downloaded_at, url,
+                                      file_size, sha256, verified_at))
+        for sql, params in _tag_statements(vid, tags):
+            writer.execute(sql, params)
+
+
+def update_video_tags(writer, vid, title, tags, summary, fingerprint=None):
+    """Queue the AI tagging results for an already recorded video."""
+    tags = split_tags(tags)
+    with writer.group():
+        writer.execute(
+            'UPDATE videos SET title = ?, tags = ?, summary = ?, tag_fingerprint = ? WHERE id = ?',
+            (title, ','.join(tags), summary, fingerprint, vid),
+        )
+        for sql, params in _tag_statements(vid, tags):
+            writer.execute(sql, params)
+
+
+def search_catalog(conn, terms, since=None, collection=None, limit=50):
+    """
+    Full-text search over title, summary and tags, best matches first.
+
+    Every term must match. `since` is a date prefix such as "2025-08" or
+    "2025-08-14" compared against downloaded_at.
+    """
+    words = [w for t in terms for w in re.findall(r'\w+', t)]
+    sql = 'SELECT v.id, v.collection, v.file_path, v.title, v.tags, v.summary, v.downloaded_at FROM videos v'
+    where, params = [], []
+    if words:
+        sql += ' JOIN videos_fts f ON f.rowid = v.rowid'
+        where.append('videos_fts MATCH ?')
+        params.append(' '.join(f'"{w}"' for w in words))
+    if since:
+        where.append('v.downloaded_at >= ?')
+        params.append(since)
+    if collection:
+        where.append('v.collection = ?')
+        params.append(collection)
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY ' + ('bm25(videos_fts)' if words else 'v.downloaded_at DESC') + ' LIMIT ?'
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def videos_with_tag(conn, tag):
+    return [row[0] for row in conn.execute(
+        'SELECT vt.video_id FROM video_tags vt JOIN tags t ON t.id = vt.tag_id WHERE t.name = ?',
+        (tag.strip().lower(),),
+    )]
+
+
+def load_sync_state(conn, source):
+    """(newest_id, newest_time) recorded by the last complete sync of source, or None."""
+    row = conn.execute('SELECT newest_id, newest_time FROM sync_state WHERE source = ?', (source,)).fetchone()
+    return row if row and row[0] else None
+
+
+def save_sync_state(conn, source, newest_id, newest_time=None):
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO sync_state (source, newest_id, newest_time, synced_at) VALUES (?, ?, ?, ?)',
+            (source, newest_id, newest_time, time.strftime('%Y-%m-%d %H:%M:%S')),
+        )
+
+
+def save_run_report(conn, report):
+    """Store one run's metrics report (a JSON document) in run_reports."""
+    with conn:
+        conn.execute(
+            'INSERT INTO run_reports (started_at, source, report) VALUES (?, ?, ?)',
+            (report.get('started_at'), report.get('source'), json.dumps(report)),
+        )
+
+
+def load_run_reports(conn, limit=1):
+    """The most recent run reports, newest first."""
+    rows = conn.execute('SELECT report FROM run_reports ORDER BY id DESC LIMIT ?', (limit,))
+    return [json.loads(report) for (report,) in rows]
+
+
+def save_priorities(conn, rows):
+    """Replace the download priorities with rows of (id, score, watches, shares)."""
+    with conn:
+        conn.execute('DELETE FROM download_priority')
+        conn.executemany('INSERT INTO download_priority (id, score, watches, shares) VALUES (?, ?, ?, ?)', rows)
+
+
+def load_priorities(conn):
+    """{video id: score} saved by `python -m collector.analytics priorities --save`."""
+    return dict(conn.execute('SELECT id, score FROM download_priority'))
+
+
+class CatalogWriter:
+    """
+    Single writer thread fed by a queue, safe to share between producers.
+
+    Statements are applied in the order they were queued and committed every
+    `batch_size` units or `flush_interval` seconds, whichever comes first.
+    A unit is a single execute() or everything queued inside group().
+    close() commits whatever is left. A failed statement rolls back its unit
+    and a failed commit its batch; the writer keeps draining the queue and
+    flush() and close() raise the first error. With `metrics` (a RunMetrics), the time
+    spent applying units and committing is recorded from the writer thread.
+    """
+
+    def __init__(self, db_path, batch_size=100, flush_interval=2.0, metrics=None):
+        self.db_path = db_path
+        self.metrics = metrics
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.error = None
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='catalog-writer', daemon=True)
+        self._thread.start()
+
+    def execute(self, sql, params=()):
+        group = getattr(self._local, 'group', None)
+        if group is not None:
+            group.append((sql, params))
+        else:
+            self._queue.put([(sql, params)])
+
+    @contextmanager
+    def group(self):
+        """Queue every execute() made in this block as one unit, never split across commits."""
+        if getattr(self._local, 'group', None) is not None:
+            yield  # already inside a group
+            return
+        statements = self._local.group = []
+        try:
+            yield
+        finally:
+            self._local.group = None
+        self._queue.put(statements)
+
+    def flush(self):
+        """Block until everything queued so far is committed; raises the first write error, if any."""
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(1.0):
+            if not self._thread.is_alive():
+                raise self.error or RuntimeError('catalog writer thread stopped')
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _error(self, e):
+        print('Catalog write failed:', e)
+        if self.error is None:
+            self.error = e
+
+    def _fail(self, conn, e):
+        """Record an error outside a unit and drop whatever the open transaction holds."""
+        self._error(e)
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _run(self):
+        conn = connect(self.db_path)
+        pending = 0
+        oldest = 0.0
+        try:
+            while True:
+                timeout = None
+                if pending:
+                    timeout = max(0.0, self.flush_interval - (time.monotonic() - oldest))
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = 'flush'
+
+                if item is None or item == 'flush' or isinstance(item, threading.Event):
+                    try:
+                        self._commit(conn, pending)
+                    except sqlite3.Error as e:
+                        self._fail(conn, e)
+                    pending = 0
+                    if item is None:
+                        break
+                    if isinstance(item, threading.Event):
+                        item.set()
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    # A savepoint per unit, so a failing statement undoes the rest of its unit too
+                    if not conn.in_transaction:
+                        conn.execute('BEGIN')
+                    conn.execute('SAVEPOINT unit')
+                except sqlite3.Error as e:
+                    self._fail(conn, e)
+                    pending = 0
+                    continue
+                try:
+                    for sql, params in item:
+                        conn.execute(sql, params)
+                    conn.execute('RELEASE unit')
+                except sqlite3.Error as e:
+                    self._error(e)
+                    try:
+                        conn.execute('ROLLBACK TO unit')
+                        conn.execute('RELEASE unit')
+                    except sqlite3.Error as e:
+                        self._fail(conn, e)
+                        pending = 0
+                    continue
+                if self.metrics is not None:
+                    self.metrics.observe('catalog_write', time.perf_counter() - start)
+                if not pending:
+                    oldest = time.monotonic()
+                pending += 1
+                if pending >= self.batch_size:
+                    try:
+                        self._commit(conn, pending)
+                    except sqlite3.Error as e:
+                        self._fail(conn, e)
+                    pending = 0
+        finally:
+            conn.close()
+
+    def _commit(self, conn, pending):
+        start = time.perf_counter()
+        conn.commit()
+        if self.metrics is not None and pending:
+            self.metrics.observe('catalog_commit', time.perf_counter() - start)
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Query the video catalog.')
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    search = sub.add_parser('search', help='e.g. search carp boilie since 2025-08')
+    search.add_argument('terms', nargs='*')
+    search.add_argument('--since')
+    search.add_argument('--collection')
+    search.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    terms, since = list(args.terms), args.since
+    if 'since' in terms:
+        i = terms.index('since')
+        since = since or (terms[i + 1] if i + 1 < len(terms) else None)
+        del terms[i:i + 2]
+
+    conn = init_catalog(args.db)
+    start = time.perf_counter()
+    rows = search_catalog(conn, terms, since=since, collection=args.collection, limit=args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for vid, collection, file_path, title, tags, _summary, downloaded_at in rows:
+        print(f'{vid}  {downloaded_at}  [{collection}]  {title}  ({tags})\n    {file_path}')
+    print(f'{len(rows)} result(s) in {elapsed:.1f} ms')
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
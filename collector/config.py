@@ -0,0 +1,60 @@
+"""Settings from config.ini, read once and shared by every entry point.
+
+Reading the file has no other side effects: folders are created by the
+pipeline when a run actually needs them.
+"""
+import configparser
+
+
+class Settings:
+    """config.ini [DEFAULT] values as attributes, with the documented defaults."""
+
+    def __init__(self, path='config.ini'):
+        cfg = configparser.ConfigParser()
+        cfg.read(path)
+        d = cfg['DEFAULT']
+
+        self.base_dir = d.get('BASE_DIR', 'TikTok_Downloads')
+        self.history_file = d.get('HISTORY_FILE', 'download_history.json')
+        self.use_ai = d.getboolean('USE_AI', True)
+        self.catalog_db = d.get('CATALOG_DB', 'catalog.db')
+        self.max_per_folder = d.getint('TIKTOKAPI_MAX_PER_FOLDER', 500)
+
+        # Export source
+        self.export_json = d.get('EXPORT_JSON', 'user_data_tiktok.json')
+
+        # Performance
+        self.download_workers = d.getint('DOWNLOAD_WORKERS', 3)
+        self.download_host_interval = d.getfloat('DOWNLOAD_HOST_INTERVAL', 1.0)
+        self.catalog_batch_size = d.getint('CATALOG_BATCH_SIZE', 50)
+        self.catalog_flush_secs = d.getfloat('CATALOG_FLUSH_SECS', 5.0)
+        self.tagging_concurrency = d.getint('TAGGING_CONCURRENCY', 2)
+        self.tagging_batch_size = d.getint('TAGGING_BATCH_SIZE', 5)
+        self.partial_max_age_days = d.getfloat('PARTIAL_MAX_AGE_DAYS', 7)
+        self.use_content_store = d.getboolean('USE_CONTENT_STORE', True)
+        self.failure_retry_hours = d.getfloat('FAILURE_RETRY_HOURS', 6)
+        self.failure_max_attempts = d.getint('FAILURE_MAX_ATTEMPTS', 8)
+
+        # Perceptual hashing of downloads (needs ffmpeg)
+        self.use_phash = d.getboolean('USE_PHASH', True)
+        self.ffmpeg = d.get('FFMPEG', 'ffmpeg')
+        self.phash_frames = d.getint('PHASH_FRAMES', 4)
+        self.phash_max_distance = d.getint('PHASH_MAX_DISTANCE', 10)
+        self.phash_link_duplicates = d.getboolean('PHASH_LINK_DUPLICATES', False)
+
+        # Daemon mode (--daemon)
+        self.daemon_interval_minutes = d.getfloat('DAEMON_INTERVAL_MINUTES', 1440)
+        self.daemon_poll_secs = d.getfloat('DAEMON_POLL_SECS', 5)
+        self.daemon_status_port = d.getint('DAEMON_STATUS_PORT', 8767)
+
+        # Official API source
+        self.tiktok_client_key = d.get('TIKTOK_CLIENT_KEY', '').strip()
+        self.tiktok_client_secret = d.get('TIKTOK_CLIENT_SECRET', '').strip()
+        self.tiktok_redirect_uri = d.get('TIKTOK_REDIRECT_URI', 'http://localhost:8080/callback')
+        self.tiktok_scope = d.get('TIKTOK_SCOPE', 'user.info.basic,video.list')  # Add data.portability if available
+        self.token_file = d.get('TOKEN_FILE', 'tiktok_access_token.json')
+        self.tiktok_api_base = d.get('TIKTOK_API_BASE', 'https://open.tiktokapis.com').rstrip('/')
+        self.tiktok_token_url = d.get('TIKTOK_TOKEN_URL', f'{self.tiktok_api_base}/v2/oauth/token/')
+        self.token_refresh_margin = d.getint('TOKEN_REFRESH_MARGIN', 300)
+        self.api_requests_per_minute = d.getfloat('API_REQUESTS_PER_MINUTE', 60)
+        self.api_max_retries = d.getint('API_MAX_RETRIES', 5)
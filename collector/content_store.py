@@ -0,0 +1,146 @@
+"""Content-addressed storage for downloaded videos.
+
+Each distinct file is kept once under BASE_DIR/.store/<aa>/<sha256><ext>, and
+the file in the collection folder is a hardlink to it (or a symlink where
+hardlinks are not possible). Re-shares of the same clip under another URL,
+or the same clip in several collections, then cost no extra disk space. On
+a drive that supports neither (FAT32, exFAT), files are left where they are
+rather than stored twice.
+
+    python -m collector.content_store dedupe    # fold an existing TikTok_Downloads tree into the store
+"""
+import argparse
+import os
+import shutil
+import threading
+import time
+
+from .catalog import CatalogWriter, init_catalog
+from .config import Settings
+from .integrity import file_sha256
+
+VIDEO_EXTS = ('.mp4', '.webm', '.mkv', '.mov', '.m4a')
+
+
+def link(src, dst):
+    """Hardlink src to dst, falling back to a symlink; None if neither is possible."""
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dst)
+        return 'symlink'
+    except OSError:
+        return None
+
+
+def link_or_copy(src, dst):
+    """Hardlink src to dst, falling back to a symlink and then a copy."""
+    kind = link(src, dst)
+    if kind is None:
+        shutil.copy2(src, dst)
+        kind = 'copy'
+    return kind
+
+
+class ContentStore:
+    """Blob store keyed by sha256; safe to share between download threads."""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def _no_links(self, path):
+        if not self._warned:
+            self._warned = True
+            print(f'Cannot hardlink or symlink {path} into {self.root}; '
+                  'videos on this drive are kept as plain files (USE_CONTENT_STORE = false hides this)')
+
+    def blob_path(self, sha256, ext):
+        return os.path.join(self.root, sha256[:2], sha256 + ext.lower())
+
+    def ingest(self, path, sha256):
+        """
+        Move path into the store (or drop it if the content is already there)
+        and put a link back in its place. Returns (blob path, was duplicate),
+        or (None, False) with path left untouched where links are not possible.
+        """
+        blob = self.blob_path(sha256, os.path.splitext(path)[1])
+        with self._lock:
+            if os.path.exists(blob):
+                if os.path.exists(path) and os.path.samefile(path, blob):
+                    return blob, False
+                # Link beside the file first, so it is only replaced once a link exists
+                tmp = path + '.link'
+                if os.path.lexists(tmp):
+                    os.remove(tmp)  # left over from an interrupted run
+                if link(blob, tmp) is None:
+                    self._no_links(path)
+                    return None, False
+                os.replace(tmp, path)
+                return blob, True
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(path, blob)
+            if link(blob, path) is None:
+                # A copy would store the video twice; put the file back instead
+                os.replace(blob, path)
+                self._no_links(path)
+                return None, False
+        return blob, False
+
+
+def dedupe_tree(base_dir, db_path):
+    """Fold every video under base_dir into the store and record hashes in the catalog."""
+    store = ContentStore(os.path.join(base_dir, '.store'))
+    hashes = {}
+    duplicates = 0
+    saved = 0
+    start = time.perf_counter()
+    for root, dirs, names in os.walk(base_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != store.root]
+        for name in names:
+            path = os.path.join(root, name)
+            if not name.lower().endswith(VIDEO_EXTS) or os.path.islink(path):
+                continue
+            size = os.path.getsize(path)
+            sha256 = file_sha256(path)
+            _blob, duplicate = store.ingest(path, sha256)  # (None, False) where links are not possible
+            hashes[os.path.abspath(path)] = sha256
+            if duplicate:
+                duplicates += 1
+                saved += size
+
+    # One pass over the catalog rather than a lookup per file
+    conn = init_catalog(db_path)
+    rows = conn.execute('SELECT id, file_path FROM videos').fetchall()
+    conn.close()
+    writer = CatalogWriter(db_path, batch_size=1000)
+    try:
+        for vid, file_path in rows:
+            sha256 = hashes.get(os.path.abspath(file_path or ''))
+            if sha256:
+                writer.execute('UPDATE videos SET sha256 = ? WHERE id = ?', (sha256, vid))
+    finally:
+        writer.close()
+    files = len(hashes)
+    print(f'Scanned {files} video file(s) in {time.perf_counter() - start:.1f}s: '
+          f'{duplicates} duplicate(s), {saved / 1e6:.1f} MB freed')
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Content-addressed video store.')
+    parser.add_argument('--base-dir', default=settings.base_dir)
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('dedupe', help='move an existing download tree into the store')
+    args = parser.parse_args()
+
+    dedupe_tree(args.base_dir, args.db)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""Daemon mode: one long-running collector instead of a daily cold start.
+
+    python tiktok_collector.py --daemon
+    python tiktok_official_api.py --daemon
+
+The process keeps a PipelineState (catalog writer, history, failure store,
+yt-dlp session) and the already imported download and tagging stack warm
+between runs. Every DAEMON_POLL_SECS it checks the watched files: a changed
+export starts a run as soon as it has stopped changing for one poll, and a
+changed config.ini is re-read and the state reopened with the new settings.
+A run is also started every DAEMON_INTERVAL_MINUTES, and once at startup.
+
+Ctrl+C or SIGTERM stops cleanly: no new downloads start, the ones in flight
+and AI tagging finish, and the catalog is flushed. A second Ctrl+C aborts.
+
+A JSON status endpoint listens on 127.0.0.1:DAEMON_STATUS_PORT (0 turns it off):
+
+    GET  /status   state, queue depth, tagging backlog, throughput, last run, next scheduled run
+    POST /run      start a run now
+"""
+import json
+import os
+import signal
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import Settings
+from .pipeline import PipelineState, run
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _when(stamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stamp)) if stamp else None
+
+
+class Daemon:
+    """
+    Runs the pipeline on file changes and on a schedule, reusing one PipelineState.
+
+    make_source(settings) builds a fresh Source for each run; watch(settings)
+    lists the input files whose changes should start a run.
+    """
+
+    def __init__(self, config_path, make_source, watch=None):
+        self.config_path = config_path
+        self.make_source = make_source
+        self.watch = watch or (lambda settings: [])
+        self.stop = threading.Event()
+        self._wake = threading.Event()
+        self._requested = False
+        self.settings = None
+        self.state = None
+        self.server = None
+        self.status = 'starting'
+        self.started = time.time()
+        self.runs = 0
+        self.next_run = 0.0
+        self.last_error = None
+        self.totals = {'videos': 0, 'failed': 0}
+        self._seen = {}      # watched path -> signature when the last run started
+        self._pending = {}   # watched path -> new signature waiting to settle
+
+    def _changed(self, path):
+        """True once path differs from the last run and stayed the same for a whole poll."""
+        sig = _signature(path)
+        if sig == self._seen.get(path):
+            self._pending.pop(path, None)
+            return False
+        if self._pending.get(path) != sig:
+            self._pending[path] = sig  # just noticed, or still being written
+            return False
+        del self._pending[path]
+        self._seen[path] = sig
+        return sig is not None
+
+    def _open(self):
+        if self.state is not None:
+            state, self.state = self.state, None
+            try:
+                state.close()
+            except Exception as e:
+                # A catalog write failed earlier in that state; it was reported with its run
+                print('Closing the previous state:', e)
+        self.settings = Settings(self.config_path)
+        self._seen[self.config_path] = _signature(self.config_path)
+        self.state = PipelineState(self.settings)
+
+    def _due(self):
+        """Why a run should start now, or None."""
+        if self._requested:
+            self._requested = False
+            return 'requested'
+        if self._changed(self.config_path):
+            print(f'{self.config_path} changed, reloading settings')
+            self._open()
+            return 'config changed'
+        for path in self.watch(self.settings):
+            if self._changed(path):
+                return f'{path} changed'
+        if time.time() >= self.next_run:
+            return 'scheduled'
+        return None
+
+    def _run(self, reason):
+        print(f'\n[{_when(time.time())}] Starting run ({reason})')
+        for path in self.watch(self.settings):
+            self._seen[path] = _signature(path)
+            self._pending.pop(path, None)
+        self.status = 'running'
+        self.next_run = time.time() + self.settings.daemon_interval_minutes * 60
+        try:
+            run(self.settings, self.make_source(self.settings), state=self.state, stop=self.stop)
+            counters = (self.state.last_report or {}).get('counters', {})
+            self.totals['videos'] += counters.get('videos', 0)
+            self.totals['failed'] += counters.get('failed', 0)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = f'{type(e).__name__}: {e}'
+            traceback.print_exc()
+            # The catalog writer may have stopped; start the next run from fresh state
+            try:
+                self._open()
+            except Exception:
+                traceback.print_exc()
+        self.runs += 1
+        if not self.stop.is_set():
+            print(f'Next scheduled run at {_when(self.next_run)}; watching for changes')
+
+    def request_run(self):
+        self._requested = True
+        self._wake.set()
+
+    def status_json(self):
+        state = self.state
+        last = state.last_report if state is not None else None
+        current = state.metrics.snapshot() if state is not None and state.metrics is not None else None
+        if current is not None:
+            tagger = state.tagger
+            # Videos waiting for AI tags; this backlog keeps growing while downloads outpace the API
+            current['tagging_queue'] = tagger.qsize() if tagger is not None else 0
+        return {
+            'status': self.status,
+            'pid': os.getpid(),
+            'started_at': _when(self.started),
+            'uptime_s': round(time.time() - self.started),
+            'runs': self.runs,
+            'next_run_at': _when(self.next_run),
+            'current_run': current,
+            'last_run': {
+                'started_at': last['started_at'],
+                'status': last['status'],
+                'elapsed_s': last['elapsed_s'],
+                'videos': last['counters'].get('videos', 0),
+                'failed': last['counters'].get('failed', 0),
+                'videos_per_min': last['videos_per_min'],
+                'mb_downloaded': last['mb_downloaded'],
+            } if last else None,
+            'totals': dict(self.totals),
+            'downloaded': len(state.history) if state is not None else 0,
+            'watching': [self.config_path] + list(self.watch(self.settings)) if self.settings else [],
+            'last_error': self.last_error,
+        }
+
+    def _handle_signal(self, signum, frame):
+        if self.stop.is_set():
+            raise KeyboardInterrupt
+        print('\nStopping once the downloads in progress finish (Ctrl+C again to abort)...')
+        self.status = 'stopping'
+        self.stop.set()
+        self._wake.set()
+
+    def _start_server(self, port):
+        if not port:
+            return
+        daemon = self
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code, body):
+                out = json.dumps(body, indent=2).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def do_GET(self):
+                if self.path.rstrip('/') in ('', '/status'):
+                    self._send(200, daemon.status_json())
+                else:
+                    self._send(404, {'error': 'not found'})
+
+            def do_POST(self):
+                if self.path.rstrip('/') == '/run':
+                    daemon.request_run()
+                    self._send(202, {'requested': True})
+                else:
+                    self._send(404, {'error': 'not found'})
+
+        try:
+            self.server = ThreadingHTTPServer(('127.0.0.1', port), StatusHandler)
+        except OSError as e:
+            print(f'Status endpoint disabled, cannot listen on port {port}: {e}')
+            return
+        threading.Thread(target=self.server.serve_forever, name='daemon-status', daemon=True).start()
+        print(f'Status: http://127.0.0.1:{port}/status')
+
+    def serve_forever(self):
+        signal.signal(signal.SIGINT, self._handle_signal)
+        for name in ('SIGTERM', 'SIGBREAK'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), self._handle_signal)
+        self._open()
+        self._start_server(self.settings.daemon_status_port)
+        try:
+            while not self.stop.is_set():
+                reason = self._due()
+                if reason:
+                    self._run(reason)
+                if self.stop.is_set():
+                    break
+                self.status = 'idle'
+                self._wake.wait(self.settings.daemon_poll_secs)
+                self._wake.clear()
+        finally:
+            self.status = 'stopping'
+            if self.server is not None:
+                self.server.shutdown()
+                self.server.server_close()
+            if self.state is not None:
+                self.state.close()
+            print(f'Daemon stopped after {self.runs} run(s), {self.totals["videos"]} new video(s)')
+
+
+def serve(config_path, make_source, watch=None):
+    Daemon(config_path, make_source, watch).serve_forever()
@@ -0,0 +1,161 @@
+"""Concurrent download engine shared by both collector entry points.
+
+Downloads run on a bounded thread pool. Results are handed back on the
+calling thread in submission order, so history, catalog and metadata writes
+stay single-threaded and are recorded one video at a time, exactly as the
+sequential loop did.
+
+A single DownloaderSession is shared by the workers so yt-dlp start-up cost
+(extractor registration, option parsing, HTTP session setup) is paid once
+per concurrent download rather than once per video, and, in daemon mode,
+once per process rather than once per run.
+"""
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+DownloadJob = namedtuple('DownloadJob', 'vid url collection folder')
+
+
+YDL_OPTS = {
+    'outtmpl': '%(uploader)s - %(id)s - %(title)s.%(ext)s',
+    'format': 'mp4',
+    'noplaylist': True,
+    'quiet': True,
+    'no_warnings': True,
+    'noprogress': True,
+    # Resume .part files with HTTP range requests, fetched in chunks so a
+    # dropped connection only costs the current chunk.
+    'continuedl': True,
+    'nopart': False,
+    'http_chunk_size': 10 * 1024 * 1024,
+    'retries': 10,
+    'fragment_retries': 10,
+}
+
+
+class DownloaderSession:
+    """
+    Long-lived yt-dlp session that can be shared by worker threads.
+
+    YoutubeDL is not safe for concurrent downloads, so each download borrows
+    an idle instance from a pool (building one only when all are busy) and
+    returns it afterwards with its HTTP connection pool intact. The pool never
+    holds more instances than downloads ever ran at once, whichever threads
+    run them. The output folder is switched per call through the `paths`
+    option, which yt-dlp reads when naming each file.
+    """
+
+    def __init__(self, **opts):
+        self.opts = {**YDL_OPTS, **opts}
+        self._idle = queue.LifoQueue()  # most recently used first, its connections are warmest
+        self._lock = threading.Lock()
+        self._instances = []
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        # Imported here: yt-dlp takes a quarter of a second to load
+        from yt_dlp import YoutubeDL
+        ydl = YoutubeDL(dict(self.opts))
+        with self._lock:
+            self._instances.append(ydl)
+        return ydl
+
+    def download(self, url, out_folder):
+        """Download url into out_folder; returns (file path, expected size or None)."""
+        ydl = self._acquire()
+        try:
+            ydl.params['paths'] = {'home': out_folder}
+            info = ydl.extract_info(url, download=True)
+            requested = (info.get('requested_downloads') or [{}])[0]
+            path = requested.get('filepath') or ydl.prepare_filename(info)
+            return path, requested.get('filesize') or info.get('filesize')
+        finally:
+            self._idle.put(ydl)
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+            self._idle = queue.LifoQueue()
+        for ydl in instances:
+            ydl.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HostRateLimiter:
+    """Space out request starts so each host sees at most one per interval."""
+
+    def __init__(self, min_interval=0.0):
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        if not self.min_interval:
+            return
+        host = (urlparse(url).hostname or '').lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class DownloadEngine:
+    """Run downloads on `workers` threads and record results in order."""
+
+    def __init__(self, workers=1, host_interval=0.0):
+        self.workers = max(1, int(workers))
+        self.limiter = HostRateLimiter(host_interval)
+
+    def _run_one(self, work, job):
+        self.limiter.wait(job.url)
+        return work(job)
+
+    def run(self, jobs, work, record, stop=None):
+        """
+        Call work(job) for every job on the pool, then record(job, result, error)
+        on the calling thread in the order the jobs were given.
+
+        At most twice the worker count is in flight, so a slow download only
+        holds back recording of a bounded number of finished ones. Once the
+        threading.Event stop is set, no more jobs start; in-flight ones finish
+        and are recorded.
+        """
+        window = self.workers * 2
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='download')
+
+        def drain(limit):
+            while len(pending) > limit:
+                job, future = pending.popleft()
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                record(job, result, error)
+
+        try:
+            for job in jobs:
+                if stop is not None and stop.is_set():
+                    break
+                pending.append((job, executor.submit(self._run_one, work, job)))
+                drain(window)
+            drain(0)
+        finally:
+            # On Ctrl+C or a recording error, drop queued work; in-flight
+            # downloads finish and leave resumable partial files.
+            executor.shutdown(wait=True, cancel_futures=True)
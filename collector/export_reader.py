@@ -0,0 +1,130 @@
+"""Streaming reader for TikTok's "Download your data" export JSON.
+
+The export is parsed as a stream of events with ijson, so memory stays flat
+however large the file is, and nesting depth is handled without recursion.
+
+Extracted links are also kept in an index table in the catalog, keyed by the
+export file's size, mtime and content hash, so an unchanged export is not
+re-parsed on the next run. An index built by an older RESOLVER_VERSION is
+dropped and rebuilt, so newly handled link shapes are picked up.
+"""
+import functools
+import os
+import time
+import ijson
+
+from .integrity import file_sha256
+from .video_ids import RESOLVER_VERSION, looks_like_video_link
+
+
+@functools.lru_cache(maxsize=None)  # an export has only a handful of distinct prefixes
+def _section(prefix):
+    # "Your Activity.Watch History.VideoList.item" -> "Watch History"
+    parts = [p for p in prefix.split('.') if p and p != 'item']
+    if len(parts) > 1:
+        return parts[1]
+    return parts[0] if parts else 'Export'
+
+
+def iter_export_links(export_path, extract_id, dedupe=True, video_only=True):
+    """
+    Yield (video_id, url, date, section) for each video link in the export.
+
+    Every JSON object carrying a "Link" to a video is reported once its closing
+    brace is read. With dedupe=True only the first link seen for each video id
+    is yielded; video_only=False also reports links that are not videos.
+    """
+    seen_ids = set()
+    open_objects = []  # [link, date] for each JSON object currently open
+    with open(export_path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f):
+            if event == 'start_map':
+                open_objects.append([None, None])
+            elif event == 'end_map':
+                link, date = open_objects.pop()
+                if not link or (video_only and not looks_like_video_link(link)):
+                    continue
+                vid = extract_id(link)
+                if not vid:
+                    continue
+                if dedupe:
+                    if vid in seen_ids:
+                        continue
+                    seen_ids.add(vid)
+                yield vid, link, date, _section(prefix)
+            elif event == 'string' and open_objects:
+                key = prefix.rpartition('.')[2]
+                if key == 'Link':
+                    open_objects[-1][0] = value
+                elif key == 'Date':
+                    open_objects[-1][1] = value
+
+
+def init_export_index(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS export_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime REAL,
+            sha256 TEXT,
+            indexed_at TEXT,
+            resolver INTEGER
+        )
+    ''')
+    if 'resolver' not in [c[1] for c in conn.execute('PRAGMA table_info(export_files)')]:
+        conn.execute('ALTER TABLE export_files ADD COLUMN resolver INTEGER')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS export_links (
+            id TEXT PRIMARY KEY,
+            url TEXT,
+            date TEXT,
+            section TEXT
+        )
+    ''')
+    conn.commit()
+
+
+def load_export_index(conn, export_path, extract_id):
+    """
+    Return (links, stats) for the export, re-parsing only when it changed.
+
+    links is every indexed (video_id, url, date, section) in first-seen order.
+    stats has 'hit' (bool), 'new' (links added by this call) and 'seconds'.
+    A matching size and mtime is trusted without hashing; otherwise the file
+    is hashed and only parsed if the content really differs.
+    """
+    start = time.perf_counter()
+    init_export_index(conn)
+    stale = conn.execute('SELECT 1 FROM export_files WHERE resolver IS NOT ? LIMIT 1', (RESOLVER_VERSION,)).fetchone()
+    if stale:
+        # Links were extracted with older id rules; start the index over
+        with conn:
+            conn.execute('DELETE FROM export_links')
+            conn.execute('DELETE FROM export_files')
+    path = os.path.abspath(export_path)
+    st = os.stat(path)
+    row = conn.execute('SELECT size, mtime, sha256 FROM export_files WHERE path = ?', (path,)).fetchone()
+
+    hit = bool(row) and row[0] == st.st_size and row[1] == st.st_mtime
+    digest = row[2] if hit else file_sha256(path)
+    if not hit:
+        # Touched, copied or renamed but with the same content
+        hit = conn.execute('SELECT 1 FROM export_files WHERE sha256 = ?', (digest,)).fetchone() is not None
+
+    new = 0
+    if not hit:
+        before = conn.total_changes
+        conn.executemany(
+            'INSERT OR IGNORE INTO export_links (id, url, date, section) VALUES (?, ?, ?, ?)',
+            iter_export_links(path, extract_id),
+        )
+        new = conn.total_changes - before
+    conn.execute(
+        'INSERT OR REPLACE INTO export_files (path, size, mtime, sha256, indexed_at, resolver) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        (path, st.st_size, st.st_mtime, digest, time.strftime('%Y-%m-%d %H:%M:%S'), RESOLVER_VERSION),
+    )
+    conn.commit()
+
+    links = conn.execute('SELECT id, url, date, section FROM export_links ORDER BY rowid').fetchall()
+    return links, {'hit': hit, 'new': new, 'seconds': time.perf_counter() - start}
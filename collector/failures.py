@@ -0,0 +1,188 @@
+"""Per-video failure tracking and retry scheduling.
+
+Every failed download is recorded in the catalog's `failures` table with its
+error class, attempt count and when it may be tried again. Transient errors
+(network, rate limits, truncated files) back off exponentially, and videos
+that need a signed-in session (age-gated, "log in to view") start from a
+long delay, since adding cookies usually fixes them; permanent
+ones (removed, private, geo-blocked, unsupported) are quarantined at once,
+and anything still failing after `max_attempts` is quarantined too. Routine
+runs skip videos that are quarantined or not due yet, so dead links cost
+nothing.
+
+    python -m collector.failures report [--quarantined] [--class private]
+    python -m collector.failures retry 7551772002869185815 ...   # or --all
+"""
+import argparse
+import re
+import sqlite3
+import time
+
+from .catalog import connect, init_catalog
+from .config import Settings
+from .integrity import IntegrityError
+
+# (error class, permanent, pattern over the error message), first match wins
+ERROR_CLASSES = (
+    ('private', True, r'permission to view|private (?:video|post|account)|(?:video|post|account) is private'),
+    ('geo_blocked', True, r'ip address is blocked|not available in your (?:country|region)|geo.?(?:restrict|block)'),
+    ('removed', True, r'video not available|has been removed|no longer available|http error 404|'
+                      r'video unavailable|account (?:is )?banned'),
+    ('unsupported', True, r'unsupported url'),
+    ('login_required', False, r'\blog ?in|sign ?in|cookies|age.?(?:restrict|gate|verif)|inappropriate for some users'),
+    ('rate_limited', False, r'http error 429|too many requests|rate.?limit'),
+    ('network', False, r'timed? ?out|connection|http error 5\d\d|temporar|\bssl\b|reset by peer|name resolution'),
+)
+# Shortest retry delay for classes that will not clear up within hours
+MIN_BACKOFF_DAYS = {'login_required': 7}
+_CLASSIFIERS = [(name, permanent, re.compile(pattern, re.IGNORECASE)) for name, permanent, pattern in ERROR_CLASSES]
+
+
+def classify(error):
+    """(error class, permanent) for an exception raised while fetching a video."""
+    if isinstance(error, IntegrityError):
+        return 'integrity', False
+    message = str(error)
+    for name, permanent, pattern in _CLASSIFIERS:
+        if pattern.search(message):
+            return name, permanent
+    return 'unknown', False
+
+
+class FailureStore:
+    """
+    Failed videos and their retry schedule, loaded once per run.
+
+    Like HistoryStore, writes go through the CatalogWriter when one is given
+    so they commit together with the rest of the run's rows.
+    """
+
+    def __init__(self, db_path, writer=None, retry_hours=6.0, max_attempts=8, max_backoff_days=30.0):
+        self.writer = writer
+        self.retry_secs = retry_hours * 3600
+        self.max_backoff = max_backoff_days * 86400
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(db_path)
+        self.reload()
+
+    def reload(self):
+        """Re-read the table, e.g. after `retry` changed it from another process."""
+        # id -> (attempts, next_attempt_at, quarantined)
+        self._rows = {vid: (attempts, next_at, bool(quarantined)) for vid, attempts, next_at, quarantined in
+                      self.conn.execute('SELECT id, attempts, next_attempt_at, quarantined FROM failures')}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def status(self, vid, now=None):
+        """'due' if vid should be tried this run, else 'quarantined' or 'backoff'."""
+        row = self._rows.get(vid)
+        if row is None:
+            return 'due'
+        _attempts, next_at, quarantined = row
+        if quarantined:
+            return 'quarantined'
+        return 'due' if (next_at or 0) <= (now or time.time()) else 'backoff'
+
+    def _execute(self, sql, params):
+        if self.writer is not None:
+            self.writer.execute(sql, params)
+        else:
+            with self.conn:
+                self.conn.execute(sql, params)
+
+    def record(self, vid, url, collection, error):
+        """Log a failed attempt; returns (error class, quarantined)."""
+        error_class, permanent = classify(error)
+        attempts = self._rows.get(vid, (0, None, False))[0] + 1
+        now = time.time()
+        quarantined = permanent or attempts >= self.max_attempts
+        delay = max(self.retry_secs * 2 ** (attempts - 1), MIN_BACKOFF_DAYS.get(error_class, 0) * 86400)
+        next_at = None if quarantined else now + min(self.max_backoff, delay)
+        self._execute(
+            'INSERT INTO failures (id, url, collection, error_class, message, attempts, first_failed_at, '
+            'last_attempt_at, next_attempt_at, quarantined) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET url = excluded.url, collection = excluded.collection, '
+            'error_class = excluded.error_class, message = excluded.message, attempts = excluded.attempts, '
+            'last_attempt_at = excluded.last_attempt_at, next_attempt_at = excluded.next_attempt_at, '
+            'quarantined = excluded.quarantined',
+            (vid, url, collection, error_class, str(error)[:500], attempts, now, now, next_at, int(quarantined)),
+        )
+        self._rows[vid] = (attempts, next_at, quarantined)
+        return error_class, quarantined
+
+    def clear(self, vid):
+        """Forget a video's failures once it downloads."""
+        if self._rows.pop(vid, None) is not None:
+            self._execute('DELETE FROM failures WHERE id = ?', (vid,))
+
+    def close(self):
+        self.conn.close()
+
+
+def report(db_path, quarantined_only=False, error_class=None, limit=50):
+    conn = init_catalog(db_path)
+    summary = conn.execute(
+        'SELECT error_class, SUM(quarantined), COUNT(*) FROM failures GROUP BY error_class ORDER BY COUNT(*) DESC'
+    ).fetchall()
+    where, params = [], []
+    if quarantined_only:
+        where.append('quarantined = 1')
+    if error_class:
+        where.append('error_class = ?')
+        params.append(error_class)
+    sql = ('SELECT id, error_class, attempts, last_attempt_at, next_attempt_at, quarantined, url, message '
+           'FROM failures' + (' WHERE ' + ' AND '.join(where) if where else '') +
+           ' ORDER BY last_attempt_at DESC LIMIT ?')
+    rows = conn.execute(sql, params + [limit]).fetchall()
+    conn.close()
+
+    if not summary:
+        print('No failed videos recorded')
+        return
+    for name, quarantined, count in summary:
+        print(f'{name:<14} {count:>6} failed  {quarantined:>6} quarantined')
+    print()
+    for vid, name, attempts, last_at, next_at, quarantined, url, message in rows:
+        when = 'quarantined' if quarantined else 'retry ' + time.strftime('%Y-%m-%d %H:%M', time.localtime(next_at))
+        print(f'{vid}  {name:<12} x{attempts:<3} {when:<22} {url}')
+        print(f'    {message.splitlines()[0] if message else ""}')
+
+
+def retry(db_path, ids=None):
+    """Make quarantined or backing-off videos due on the next run."""
+    conn = connect(db_path)
+    with conn:
+        if ids:
+            cur = conn.executemany(
+                'UPDATE failures SET quarantined = 0, next_attempt_at = NULL WHERE id = ?', [(i,) for i in ids])
+        else:
+            cur = conn.execute('UPDATE failures SET quarantined = 0, next_attempt_at = NULL')
+    conn.close()
+    print(f'{cur.rowcount} video(s) will be retried on the next run')
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Failed download tracking.')
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('report', help='list failed and quarantined videos')
+    cmd.add_argument('--quarantined', action='store_true', help='only quarantined videos')
+    cmd.add_argument('--class', dest='error_class', choices=[c[0] for c in ERROR_CLASSES] + ['integrity', 'unknown'])
+    cmd.add_argument('--limit', type=int, default=50)
+    cmd = sub.add_parser('retry', help='retry videos on the next run regardless of their schedule')
+    cmd.add_argument('ids', nargs='*')
+    cmd.add_argument('--all', action='store_true')
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        report(args.db, args.quarantined, args.error_class, args.limit)
+    elif args.ids or args.all:
+        retry(args.db, args.ids or None)
+    else:
+        parser.error('give video ids or --all')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Download history kept in the catalog database.
+
+Each downloaded video is one row in the `history` table, so recording a
+download is a single durable insert instead of rewriting a JSON file that
+grows with every video. The old download_history.json is imported once.
+"""
+import json
+import os
+import sqlite3
+import time
+
+
+class HistoryStore:
+    """Set-like record of downloaded video ids and the collection each went to."""
+
+    def __init__(self, db_path, legacy_json=None, writer=None, read_only=False):
+        """
+        legacy_json is imported into the catalog once and renamed; with
+        read_only (dry runs) its ids are only read into memory.
+        """
+        self.writer = writer
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS history (
+                id TEXT PRIMARY KEY,
+                collection TEXT,
+                added_at TEXT
+            )
+        ''')
+        self.conn.commit()
+        if legacy_json and not read_only:
+            self._migrate_json(legacy_json)
+        self._ids = dict(self.conn.execute('SELECT id, collection FROM history'))
+        if legacy_json and read_only:
+            for vid, col in self._load_json(legacy_json).items():
+                self._ids.setdefault(vid, col)
+
+    @staticmethod
+    def _load_json(path):
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _migrate_json(self, path):
+        """Import download_history.json, then rename it so this runs once."""
+        if not os.path.exists(path):
+            return
+        legacy = self._load_json(path)
+        now = time.strftime('%Y-%m-%d %H:%M:%S')
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO history (id, collection, added_at) VALUES (?, ?, ?)',
+                ((vid, col, now) for vid, col in legacy.items()),
+            )
+        os.replace(path, path + '.migrated')
+        print(f'Migrated {len(legacy)} history entries from {path} into the catalog')
+
+    def __contains__(self, vid):
+        return vid in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, vid, default=None):
+        return self._ids.get(vid, default)
+
+    def add(self, vid, collection):
+        sql = 'INSERT OR REPLACE INTO history (id, collection, added_at) VALUES (?, ?, ?)'
+        params = (vid, collection, time.strftime('%Y-%m-%d %H:%M:%S'))
+        if self.writer is not None:
+            self.writer.execute(sql, params)
+        else:
+            with self.conn:
+                self.conn.execute(sql, params)
+        self._ids[vid] = collection
+
+    def close(self):
+        self.conn.close()
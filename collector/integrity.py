@@ -0,0 +1,119 @@
+"""Download integrity: post-download verification and partial-file sweeps.
+
+verify_download() checks a finished file's size, walks its MP4 box structure
+(a truncated file has a box running past the end, or no moov/mdat) and hashes
+it. sweep_partials() runs at startup: yt-dlp leftovers for videos already in
+history, or older than the age limit, are removed; the rest are reported so
+those videos can be resumed first from where they stopped.
+"""
+import hashlib
+import os
+import re
+import struct
+import time
+
+PARTIAL_SUFFIXES = ('.part', '.ytdl')
+_PART_FRAG = re.compile(r'\.part-Frag\d+(\.part)?$')
+# outtmpl is '%(uploader)s - %(id)s - %(title)s.%(ext)s'
+_ID_IN_NAME = re.compile(r' - (\d{6,}) - ')
+
+
+class IntegrityError(Exception):
+    """A downloaded file failed verification."""
+
+
+def mp4_boxes_ok(path):
+    """True if the top-level MP4 boxes tile the file and include ftyp, moov and mdat."""
+    size = os.path.getsize(path)
+    seen = set()
+    with open(path, 'rb') as f:
+        pos = 0
+        while pos < size:
+            f.seek(pos)
+            header = f.read(8)
+            if len(header) < 8:
+                return False
+            box_size, box_type = struct.unpack('>I4s', header)
+            if box_size == 1:
+                large = f.read(8)
+                if len(large) < 8:
+                    return False
+                box_size = struct.unpack('>Q', large)[0]
+            elif box_size == 0:
+                box_size = size - pos
+            if box_size < 8 or pos + box_size > size:
+                return False
+            seen.add(box_type)
+            pos += box_size
+    return {b'ftyp', b'moov', b'mdat'} <= seen
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def verify_download(path, expected_size=None):
+    """
+    Return {'file_size', 'sha256', 'verified_at'} for a finished download.
+
+    Raises IntegrityError (after deleting the file, so the next run fetches it
+    again rather than treating it as already downloaded) if it is empty, has
+    the wrong size or is not a complete MP4.
+    """
+    problem = None
+    if not os.path.exists(path):
+        raise IntegrityError(f'missing after download: {path}')
+    size = os.path.getsize(path)
+    if size == 0:
+        problem = 'empty file'
+    elif expected_size and size != expected_size:
+        problem = f'size {size} != expected {expected_size}'
+    elif path.lower().endswith(('.mp4', '.m4a', '.mov')) and not mp4_boxes_ok(path):
+        problem = 'incomplete MP4 container'
+    if problem:
+        os.remove(path)
+        raise IntegrityError(f'{problem}: {path}')
+    return {
+        'file_size': size,
+        'sha256': file_sha256(path),
+        'verified_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def _is_partial(name):
+    return name.endswith(PARTIAL_SUFFIXES) or _PART_FRAG.search(name) is not None
+
+
+def sweep_partials(base_dir, history, max_age_days=7):
+    """
+    Clean up yt-dlp partial files under base_dir.
+
+    Returns the set of video ids whose partial downloads were kept for
+    resuming.
+    """
+    resumable = set()
+    removed = 0
+    cutoff = time.time() - max_age_days * 86400
+    for root, _dirs, files in os.walk(base_dir):
+        for name in files:
+            if not _is_partial(name):
+                continue
+            path = os.path.join(root, name)
+            m = _ID_IN_NAME.search(name)
+            vid = m.group(1) if m else None
+            try:
+                stale = os.path.getmtime(path) < cutoff
+                if stale or (vid is not None and vid in history):
+                    os.remove(path)
+                    removed += 1
+                elif vid is not None:
+                    resumable.add(vid)
+            except OSError as e:
+                print('Could not sweep', path, e)
+    if removed or resumable:
+        print(f'Partial downloads: {len(resumable)} to resume, {removed} stale file(s) removed')
+    return resumable
@@ -0,0 +1,163 @@
+"""Fast local keyword tagger for the fishing taxonomy.
+
+Every taxonomy term, its synonyms and simple plurals are compiled into one
+regular expression shaped like a character trie (shared prefixes are only
+tried once) and anchored on word boundaries, so "line" no longer matches
+"online" and "rig" no longer matches "original". One scan of the text finds
+every tag, however large the taxonomy grows.
+
+Multi-word terms match with spaces, hyphens or underscores between the words
+("zig rig", "zig-rig"), and are also matched run together as hashtags are
+written ("#zigrig").
+"""
+import argparse
+import re
+import time
+
+from .catalog import CatalogWriter, init_catalog, update_video_tags
+from .config import Settings
+
+# Extra spellings that should map onto a canonical FISHING_TAGS entry
+FISHING_SYNONYMS = {
+    "carp": ["carping", "carper"],
+    "boilie": ["boily", "boiled bait"],
+    "method feeder": ["method"],
+    "zig rig": ["zig", "zigs"],
+    "ledgering": ["legering", "ledger", "leger"],
+    "float fishing": ["waggler", "stick float"],
+    "groundbait": ["ground bait"],
+    "hookbait": ["hook bait", "pop up", "wafter"],
+    "specimen": ["pb", "personal best"],
+    "rod setup": ["rod set up", "rod set-up"],
+    "tackle": ["kit"],
+}
+
+_SEP = ' '  # stands for any run of space, hyphen or underscore between words
+
+
+def _plurals(term):
+    head, _, last = term.rpartition(' ')
+    prefix = head + ' ' if head else ''
+    forms = {last + 's'}
+    if last.endswith(('s', 'x', 'ch', 'sh')):
+        forms = {last + 'es'}
+    elif last.endswith('y') and last[-2:-1] not in ('a', 'e', 'i', 'o', 'u'):
+        forms = {last[:-1] + 'ies', last + 's'}
+    return {prefix + f for f in forms}
+
+
+def _normalise(text):
+    return re.sub(r'[\s_-]+', ' ', text.strip().lower())
+
+
+def _trie_pattern(node):
+    """Turn a nested dict trie (None key marks end of term) into a regex."""
+    optional = None in node
+    branches = []
+    for ch in sorted(k for k in node if k is not None):
+        atom = r'[\s_-]+' if ch == _SEP else re.escape(ch)
+        rest = _trie_pattern(node[ch])
+        branches.append(atom + rest)
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if optional:
+        return '(?:' + body + ')?'
+    return body
+
+
+class KeywordTagger:
+    """Map free text onto canonical tags with a single precompiled matcher."""
+
+    def __init__(self, terms, synonyms=None):
+        self.lookup = {}
+        for term in terms:
+            self._add(term, term)
+        for canonical, spellings in (synonyms or {}).items():
+            for spelling in spellings:
+                self._add(spelling, canonical)
+
+        trie = {}
+        for variant in self.lookup:
+            node = trie
+            for ch in variant:
+                node = node.setdefault(ch, {})
+            node[None] = True
+        self.pattern = re.compile(r'(?<![^\W_])' + _trie_pattern(trie) + r'(?![^\W_])', re.IGNORECASE)
+
+    def _add(self, spelling, canonical):
+        spelling = _normalise(spelling)
+        if not spelling:
+            return
+        for form in {spelling} | _plurals(spelling):
+            self.lookup.setdefault(form, canonical)
+            if ' ' in form:
+                self.lookup.setdefault(form.replace(' ', ''), canonical)
+
+    def tag(self, text, limit=None):
+        """Canonical tags found in text, in order of first appearance."""
+        found = {}
+        for match in self.pattern.finditer(text or ''):
+            canonical = self.lookup.get(_normalise(match.group()))
+            if canonical is not None:
+                found.setdefault(canonical, None)
+                if limit and len(found) >= limit:
+                    break
+        return list(found)
+
+    def tag_many(self, texts, limit=None):
+        return [self.tag(t, limit) for t in texts]
+
+
+_default = None
+
+
+def default_tagger():
+    global _default
+    if _default is None:
+        from .ai_tagging import FISHING_TAGS
+        _default = KeywordTagger(FISHING_TAGS, FISHING_SYNONYMS)
+    return _default
+
+
+def tag_catalog(db_path, batch_size=5000):
+    """Fill in tags for untagged catalog rows from their title, summary and URL."""
+    tagger = default_tagger()
+    conn = init_catalog(db_path)
+    rows = conn.execute(
+        "SELECT id, title, summary, url, tag_fingerprint FROM videos WHERE COALESCE(tags, '') = ''"
+    ).fetchall()
+    conn.close()
+
+    writer = CatalogWriter(db_path, batch_size=batch_size)
+    tagged = 0
+    start = time.perf_counter()
+    try:
+        for vid, title, summary, url, fingerprint in rows:
+            tags = tagger.tag(' '.join(filter(None, (title, summary, url))))
+            if tags:
+                update_video_tags(writer, vid, title or 'untitled', tags, summary or '', fingerprint)
+                tagged += 1
+    finally:
+        writer.close()
+    print(f'Tagged {tagged} of {len(rows)} untagged video(s) in {time.perf_counter() - start:.2f}s')
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Local keyword tagging.')
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('catalog', help='tag every untagged catalog row in one pass')
+    text = sub.add_parser('text', help='show the tags found in some text')
+    text.add_argument('words', nargs='+')
+    args = parser.parse_args()
+
+    if args.command == 'catalog':
+        tag_catalog(args.db)
+    else:
+        print(default_tagger().tag(' '.join(args.words)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Folder layout of the download tree.
+
+Videos are stored as BASE_DIR/<collection>/<YYYY-MM>/, the month the video
+was posted (the top 32 bits of a TikTok video id are its Unix timestamp).
+Once a month folder holds TIKTOKAPI_MAX_PER_FOLDER videos, later ones spill
+into <YYYY-MM>_2, <YYYY-MM>_3, ..., so no folder grows past the limit.
+
+Trees written by older versions (one flat folder per collection, everything
+from the export in "Export") are moved into this layout with:
+
+    python -m collector.layout relayout [--dry-run]
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from .catalog import CatalogWriter, init_catalog
+from .config import Settings
+from .content_store import VIDEO_EXTS
+from .export_reader import init_export_index
+
+# Ids whose timestamp falls outside this range are not TikTok ids; they go to "other"
+FIRST_ID_TIME = 1451606400  # 2016-01-01
+
+
+def safe(name):
+    return re.sub(r'[^a-zA-Z0-9 _-]', '', name).strip()
+
+
+def shard_name(vid):
+    """'YYYY-MM' the video was posted, from its id, or 'other'."""
+    try:
+        stamp = int(vid) >> 32
+    except (TypeError, ValueError):
+        return 'other'
+    if not FIRST_ID_TIME <= stamp <= time.time() + 366 * 86400:
+        return 'other'
+    return time.strftime('%Y-%m', time.gmtime(stamp))
+
+
+def _video_count(folder):
+    try:
+        with os.scandir(folder) as entries:
+            return sum(1 for e in entries if e.name.lower().endswith(VIDEO_EXTS))
+    except FileNotFoundError:
+        return 0
+
+
+class FolderLayout:
+    """
+    Picks the folder for each new video, keeping every folder under max_per_folder.
+
+    Folders are counted on first use and then tracked in memory, so planning
+    a run lists each shard folder at most once and never creates anything.
+    """
+
+    def __init__(self, base_dir, max_per_folder=500):
+        self.base_dir = base_dir
+        self.max_per_folder = max(1, int(max_per_folder))
+        self._counts = {}
+
+    def _count(self, folder):
+        if folder not in self._counts:
+            self._counts[folder] = _video_count(folder)
+        return self._counts[folder]
+
+    def fits(self, collection, vid, folder):
+        """True if folder is one of vid's shard folders in collection."""
+        shard = shard_name(vid)
+        parent, name = os.path.split(os.path.normpath(folder))
+        return (os.path.normpath(parent) == os.path.normpath(os.path.join(self.base_dir, safe(collection)))
+                and re.fullmatch(re.escape(shard) + r'(_\d+)?', name) is not None)
+
+    def folder(self, collection, vid):
+        """Folder for a new video in collection, reserving a place in it."""
+        base = os.path.join(self.base_dir, safe(collection), shard_name(vid))
+        folder, n = base, 1
+        while self._count(folder) >= self.max_per_folder:
+            n += 1
+            folder = f'{base}_{n}'
+        self._counts[folder] += 1
+        return folder
+
+
+def _find_video(folder, vid, listings):
+    """Video file for vid in folder (rows from older versions only hold the folder)."""
+    if folder not in listings:
+        try:
+            listings[folder] = [n for n in os.listdir(folder) if n.lower().endswith(VIDEO_EXTS)]
+        except FileNotFoundError:
+            listings[folder] = []
+    return next((os.path.join(folder, n) for n in listings[folder] if vid in n), None)
+
+
+def relayout(base_dir, db_path, max_per_folder=500, dry_run=False):
+    """
+    Move every cataloged video (and its metadata file) into the sharded layout.
+
+    Videos from the old catalog-wide "Export" collection move to the export
+    section they were found in. file_path, collection and the history rows
+    are updated in bulk through one CatalogWriter.
+    """
+    start = time.perf_counter()
+    conn = init_catalog(db_path)
+    init_export_index(conn)
+    rows = conn.execute(
+        'SELECT v.id, v.collection, v.file_path, e.section FROM videos v '
+        'LEFT JOIN export_links e ON e.id = v.id ORDER BY v.id'
+    ).fetchall()
+    conn.close()
+
+    layout = FolderLayout(base_dir, max_per_folder)
+    listings = {}
+    moved = in_place = missing = 0
+    old_folders = set()
+    writer = None if dry_run else CatalogWriter(db_path, batch_size=1000)
+    try:
+        for vid, collection, file_path, section in rows:
+            path = file_path or ''
+            if os.path.isdir(path):
+                path = _find_video(path, vid, listings) or ''
+            if not os.path.isfile(path):
+                missing += 1
+                continue
+            new_collection = section if collection == 'Export' and section else collection
+            src_folder = os.path.dirname(path)
+            if new_collection == collection and layout.fits(collection, vid, src_folder):
+                in_place += 1
+                continue
+            folder = layout.folder(new_collection, vid)
+            dest = os.path.join(folder, os.path.basename(path))
+            moved += 1
+            if dry_run:
+                continue
+
+            os.makedirs(folder, exist_ok=True)
+            os.replace(path, dest)
+            meta_src = os.path.join(src_folder, f'{vid}.metadata.json')
+            if os.path.exists(meta_src):
+                meta_dest = os.path.join(folder, f'{vid}.metadata.json')
+                if new_collection != collection:
+                    with open(meta_src, 'r', encoding='utf-8') as f:
+                        meta = json.load(f)
+                    meta['collection'] = new_collection
+                    with open(meta_dest, 'w', encoding='utf-8') as f:
+                        json.dump(meta, f, indent=2)
+                    os.remove(meta_src)
+                else:
+                    os.replace(meta_src, meta_dest)
+            old_folders.add(src_folder)
+            with writer.group():
+                writer.execute('UPDATE videos SET collection = ?, file_path = ? WHERE id = ?',
+                               (new_collection, dest, vid))
+                writer.execute('UPDATE history SET collection = ? WHERE id = ?', (new_collection, vid))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    for folder in old_folders:
+        try:
+            os.rmdir(folder)  # only succeeds once nothing else is left in it
+        except OSError:
+            pass
+    verb = 'Would move' if dry_run else 'Moved'
+    print(f'{verb} {moved} video(s), {in_place} already in place, {missing} file(s) missing '
+          f'({time.perf_counter() - start:.1f}s)')
+    return moved
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Download tree layout.')
+    parser.add_argument('--base-dir', default=settings.base_dir)
+    parser.add_argument('--db', default=settings.catalog_db)
+    parser.add_argument('--max-per-folder', type=int, default=settings.max_per_folder)
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('relayout', help='move existing downloads into per-section, per-month folders')
+    cmd.add_argument('--dry-run', action='store_true', help='only count what would move')
+    args = parser.parse_args()
+
+    relayout(args.base_dir, args.db, args.max_per_folder, args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Per-run instrumentation: stage timings, throughput and the run report.
+
+Every pipeline stage is timed into a latency histogram (RunMetrics.stage()),
+counters track videos, failures and bytes, and at the end of a run the whole
+report is stored as one JSON document in the catalog's run_reports table.
+
+    python -m collector.metrics report            # last run, as a table
+    python -m collector.metrics report --jsonl -n 30 > runs.jsonl
+"""
+import argparse
+import bisect
+import cProfile
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from .catalog import init_catalog, load_run_reports
+from .config import Settings
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram:
+    """Latency samples with fixed buckets for the report and exact percentiles."""
+
+    def __init__(self):
+        self.samples = []
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def summary(self):
+        samples = sorted(self.samples)
+        n = len(samples)
+
+        def pct(p):
+            return round(samples[min(n - 1, int(p * n))] * 1000, 2)
+
+        return {
+            'count': n,
+            'total_s': round(sum(samples), 3),
+            'mean_ms': round(sum(samples) / n * 1000, 2),
+            'p50_ms': pct(0.5),
+            'p95_ms': pct(0.95),
+            'max_ms': round(samples[-1] * 1000, 2),
+            'buckets': {('le_%g' % b if i < len(BUCKETS) else 'inf'): c
+                        for i, (b, c) in enumerate(zip(BUCKETS + (None,), self.buckets)) if c},
+        }
+
+
+class RunMetrics:
+    """Thread-safe stage timings and counters for one collector run."""
+
+    def __init__(self, source=''):
+        self.source = source
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self.stages.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """Counters and throughput so far, cheap enough to poll while the run is going."""
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            counters = dict(self.counters)
+        done = counters.get('videos', 0) + counters.get('failed', 0)
+        return {
+            'source': self.source,
+            'elapsed_s': round(elapsed, 1),
+            'queued': counters.get('queued', 0),
+            'remaining': max(0, counters.get('queued', 0) - done),
+            'videos': counters.get('videos', 0),
+            'failed': counters.get('failed', 0),
+            'videos_per_min': round(counters.get('videos', 0) / elapsed * 60, 2) if elapsed else 0.0,
+        }
+
+    def report(self, status='completed', **extra):
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            stages = {name: h.summary() for name, h in self.stages.items()}
+            counters = dict(self.counters)
+        videos = counters.get('videos', 0)
+        return {
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+            'source': self.source,
+            'status': status,
+            'elapsed_s': round(elapsed, 3),
+            'videos_per_min': round(videos / elapsed * 60, 2) if elapsed else 0.0,
+            'mb_downloaded': round(counters.get('bytes', 0) / 1e6, 2),
+            'counters': counters,
+            'stages': stages,
+            **extra,
+        }
+
+
+def format_report(report):
+    lines = [
+        f"Run {report['started_at']} ({report['source']}, {report['status']}): "
+        f"{report['elapsed_s']:.1f}s, {report['counters'].get('videos', 0)} video(s), "
+        f"{report['videos_per_min']:.1f}/min, {report['mb_downloaded']:.1f} MB",
+        f"  {'stage':<14}{'count':>8}{'total s':>10}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}",
+    ]
+    for name, s in sorted(report['stages'].items(), key=lambda kv: -kv[1]['total_s']):
+        lines.append(f"  {name:<14}{s['count']:>8}{s['total_s']:>10.2f}{s['mean_ms']:>10.1f}"
+                     f"{s['p95_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    return '\n'.join(lines)
+
+
+def profiled(func, path, *args, **kwargs):
+    """Run func under cProfile, save the stats to path and print the top entries."""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(path)
+        print(f'\nProfile saved to {path} (open with `python -m pstats {path}` or snakeviz)')
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Collector run reports.')
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('report', help='show the most recent run reports')
+    cmd.add_argument('-n', '--last', type=int, default=1)
+    cmd.add_argument('--jsonl', action='store_true', help='print raw JSON lines')
+    args = parser.parse_args()
+
+    conn = init_catalog(args.db)
+    reports = load_run_reports(conn, args.last)
+    conn.close()
+    if not reports:
+        print('No runs recorded yet')
+    for report in reversed(reports):
+        print(json.dumps(report) if args.jsonl else format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+"""TikTok official API access: OAuth 2.0 tokens and the saved-videos listing.
+
+The access token (and refresh token) live in TOKEN_FILE. A token close to
+expiry is refreshed silently; the browser sign-in with a local callback
+server is only used when there is nothing left to refresh.
+"""
+import json
+import os
+import time
+import webbrowser
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from .api_client import ApiClient
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """HTTP server to catch OAuth callback."""
+    auth_code = None
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/callback':
+            query = parse_qs(parsed.query)
+            if 'code' in query:
+                CallbackHandler.auth_code = query['code'][0]
+                self.send_response(200)
+                self.send_header('Content-type', 'text/html')
+                self.end_headers()
+                self.wfile.write(b"""
+                    <html><body>
+                    <h1>Authorization successful!</h1>
+                    <p>You can close this window and return to the terminal.</p>
+                    </body></html>
+                """)
+            else:
+                error = query.get('error', ['Unknown error'])[0]
+                self.send_response(400)
+                self.send_header('Content-type', 'text/html')
+                self.end_headers()
+                self.wfile.write(f"""
+                    <html><body>
+                    <h1>Authorization failed</h1>
+                    <p>Error: {error}</p>
+                    </body></html>
+                """.encode())
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+
+class OfficialApi:
+    """Tokens and API calls for one configured TikTok app."""
+
+    def __init__(self, settings):
+        self.settings = settings
+        # One pooled, rate-limited client for every official API call
+        self.api = ApiClient(settings.api_requests_per_minute, max_retries=settings.api_max_retries)
+
+    def close(self):
+        self.api.close()
+
+    def load_token_data(self):
+        """Everything saved in TOKEN_FILE, or {} if there is nothing yet."""
+        if os.path.exists(self.settings.token_file):
+            with open(self.settings.token_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def load_access_token(self):
+        """Load saved access token from file."""
+        data = self.load_token_data()
+        return data.get('access_token'), data.get('expires_at', 0)
+
+    def save_access_token(self, access_token, expires_in, refresh_token=None, refresh_expires_in=None):
+        """Save access token (and the refresh token, when TikTok sends one) to file."""
+        expires_at = time.time() + expires_in if expires_in else 0
+        data = {
+            'access_token': access_token,
+            'expires_at': expires_at,
+            'saved_at': time.time()
+        }
+        if refresh_token:
+            data['refresh_token'] = refresh_token
+            data['refresh_expires_at'] = time.time() + refresh_expires_in if refresh_expires_in else 0
+        with open(self.settings.token_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+    def _save_token_response(self, result):
+        """Store the tokens from a /oauth/token/ response and return the access token."""
+        # The v2 endpoint answers at the top level; older responses nest under 'data'
+        payload = result.get('data', result) if isinstance(result, dict) else {}
+        if 'access_token' not in payload:
+            raise RuntimeError(f"Failed to get access token: {result}")
+        self.save_access_token(
+            payload['access_token'],
+            payload.get('expires_in', 3600),
+            payload.get('refresh_token'),
+            payload.get('refresh_expires_in'),
+        )
+        return payload['access_token']
+
+    def get_authorization_url(self):
+        """Generate TikTok OAuth authorization URL."""
+        if not self.settings.tiktok_client_key:
+            raise RuntimeError(
+                "TIKTOK_CLIENT_KEY not set in config.ini. "
+                "Get it from https://developers.tiktok.com/ after registering your app."
+            )
+
+        base_url = "https://www.tiktok.com/v2/auth/authorize/"
+        params = {
+            'client_key': self.settings.tiktok_client_key,
+            'scope': self.settings.tiktok_scope,
+            'response_type': 'code',
+            'redirect_uri': self.settings.tiktok_redirect_uri,
+            'state': 'tiktok_collector_auth'
+        }
+
+        query_string = '&'.join([f"{k}={v}" for k, v in params.items()])
+        return f"{base_url}?{query_string}"
+
+    def exchange_code_for_token(self, auth_code):
+        """Exchange authorization code for access token."""
+        if not self.settings.tiktok_client_secret:
+            raise RuntimeError(
+                "TIKTOK_CLIENT_SECRET not set in config.ini. "
+                "Get it from https://developers.tiktok.com/ after registering your app."
+            )
+
+        data = {
+            'client_key': self.settings.tiktok_client_key,
+            'client_secret': self.settings.tiktok_client_secret,
+            'code': auth_code,
+            'grant_type': 'authorization_code',
+            'redirect_uri': self.settings.tiktok_redirect_uri
+        }
+
+        # The code is single-use: a retry after the server consumed it would only hide the real error
+        response = self.api.post(self.settings.tiktok_token_url, data=data, retries=0)
+        return self._save_token_response(response.json())
+
+    def refresh_access_token(self, refresh_token):
+        """Swap a refresh token for a new access token without the browser."""
+        data = {
+            'client_key': self.settings.tiktok_client_key,
+            'client_secret': self.settings.tiktok_client_secret,
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token
+        }
+
+        response = self.api.post(self.settings.tiktok_token_url, data=data)
+        return self._save_token_response(response.json())
+
+    def fresh_access_token(self, force_refresh=False):
+        """
+        The saved access token, silently refreshed when it is within
+        TOKEN_REFRESH_MARGIN of expiring (or when force_refresh is set).
+        Returns None when there is no usable token and no way to refresh it.
+        """
+        data = self.load_token_data()
+        access_token = data.get('access_token')
+        expires_at = data.get('expires_at', 0)
+        if access_token and not force_refresh and expires_at - self.settings.token_refresh_margin > time.time():
+            return access_token
+
+        refresh_token = data.get('refresh_token')
+        refresh_expires_at = data.get('refresh_expires_at', 0)
+        if refresh_token and (not refresh_expires_at or refresh_expires_at > time.time()):
+            try:
+                access_token = self.refresh_access_token(refresh_token)
+                print("Access token refreshed")
+                return access_token
+            except (requests.RequestException, RuntimeError) as e:
+                print(f"Token refresh failed: {e}")
+
+        # Still usable, just inside the refresh margin
+        if access_token and not force_refresh and expires_at > time.time():
+            return access_token
+        return None
+
+    def authorize(self):
+        """
+        Return a valid access token: the saved one, a silently refreshed one, or
+        as a last resort one from the interactive browser flow.
+        """
+        access_token = self.fresh_access_token()
+
+        if access_token:
+            _, expires_at = self.load_access_token()
+            print(f"Using access token (expires in {int(expires_at - time.time())} seconds)")
+            return access_token
+
+        print("Starting OAuth authorization flow...")
+        print("Opening browser for authorization...")
+
+        auth_url = self.get_authorization_url()
+        webbrowser.open(auth_url)
+
+        # Start local server to catch callback
+        port = urlparse(self.settings.tiktok_redirect_uri).port or 8080
+        server = HTTPServer(('localhost', port), CallbackHandler)
+
+        print(f"Waiting for authorization callback on http://localhost:{port}/callback")
+        print("Please authorize the app in your browser...")
+
+        # Wait for callback (timeout after 5 minutes)
+        server.timeout = 300
+        server.handle_request()
+
+        if CallbackHandler.auth_code:
+            print("Authorization code received, exchanging for access token...")
+            access_token = self.exchange_code_for_token(CallbackHandler.auth_code)
+            print("Access token obtained successfully!")
+            return access_token
+        else:
+            raise RuntimeError("Authorization failed: No code received")
+
+    def fetch_saved_videos(self, access_token, known=(), since=None):
+        """
+        Fetch saved/favorite videos using TikTok's official API.
+
+        The list comes newest first, so paging stops at `since` (the newest
+        (id, time) seen by the last complete sync) or at a page where every
+        video is already in `known`; the second also covers a `since` video
+        that has since been unfavourited or deleted. Returns (urls, newest
+        (id, time) or None).
+
+        Note: The exact endpoint depends on which API products you have access to.
+        This is a template that may need adjustment based on TikTok's current API.
+        """
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': 'application/json'
+        }
+
+        # Try Data Portability API endpoint (if you have access)
+        # This endpoint may vary - check TikTok's latest API docs
+        api_url = f"{self.settings.tiktok_api_base}/v2/research/user/favorites/"
+
+        videos = []
+        cursor = None
+        newest = None
+        pages = 0
+        refreshed = False
+
+        while True:
+            # Long fetches can outlive the token; refresh it ahead of expiry
+            access_token = self.fresh_access_token() or access_token
+            headers['Authorization'] = f'Bearer {access_token}'
+            params = {
+                'max_count': 20
+            }
+            if cursor:
+                params['cursor'] = cursor
+
+            try:
+                response = self.api.get(api_url, headers=headers, params=params)
+                data = response.json()
+
+                if 'data' in data and 'videos' in data['data']:
+                    pages += 1
+                    caught_up = False
+                    seen = known_count = 0
+                    for video in data['data']['videos']:
+                        video_id = video.get('id')
+                        if not video_id:
+                            continue
+                        video_id = str(video_id)
+                        if newest is None:
+                            newest = (video_id, video.get('create_time'))
+                        if since and video_id == since[0]:
+                            caught_up = True
+                            break
+                        seen += 1
+                        known_count += video_id in known
+                        author = video.get('author', {}).get('username', 'unknown')
+                        url = f"https://www.tiktok.com/@{author}/video/{video_id}"
+                        videos.append(url)
+
+                    if caught_up or (known and seen and known_count == seen):
+                        print(f"Caught up with earlier runs after {pages} page(s)")
+                        break
+
+                    # Check for pagination
+                    if 'has_more' in data['data'] and data['data']['has_more']:
+                        cursor = data['data'].get('cursor')
+                    else:
+                        break
+                else:
+                    # Fallback: try alternative endpoint or method
+                    print("Note: Direct favorites API may not be available.")
+                    print("You may need to use the Data Portability API differently.")
+                    print("Check TikTok's API documentation for the correct endpoint.")
+                    break
+
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 401 and not refreshed:
+                    # Revoked or expired early: refresh once and retry this page
+                    refreshed = True
+                    new_token = self.fresh_access_token(force_refresh=True)
+                    if new_token:
+                        access_token = new_token
+                        continue
+                if e.response.status_code == 403:
+                    print("API access denied. Make sure:")
+                    print("1. Your app has 'Data Portability API' product enabled")
+                    print("2. Your app has been approved by TikTok")
+                    print("3. You're requesting the correct scopes")
+                raise
+
+        return videos, newest
@@ -0,0 +1,262 @@
+"""Perceptual hashes for spotting reposts and re-uploads of the same clip.
+
+A few frames are sampled at fixed points through each video with ffmpeg,
+scaled to 32x32 grayscale, and reduced to a 64-bit DCT hash each (the
+classic pHash: low-frequency 8x8 DCT block against its median). A video's
+hash is the small uint64 array of its frame hashes, stored as a blob in the
+catalog's video_phash table.
+
+PhashIndex keeps every frame hash of the library in one packed uint64
+array. A lookup is a vectorised XOR and popcount over that array, then the
+candidate videos are compared frame by frame. Two videos are near
+duplicates when the median over the frames of one, of the distance to the
+closest frame of the other, is at most PHASH_MAX_DISTANCE bits.
+
+Black, faded and other near-uniform frames all hash alike, so they are
+dropped before hashing; a video with fewer than MIN_FRAMES informative
+frames left is stored but never matched.
+
+    python -m collector.phash scan     # hash cataloged videos that have no hash yet
+    python -m collector.phash dupes    # list near-duplicates found so far
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .catalog import CatalogWriter, init_catalog
+from .config import Settings
+
+SIZE = 32  # frames are reduced to SIZE x SIZE before the DCT
+MIN_STD = 8.0  # frames with a smaller gray level spread carry no usable detail
+MIN_FRAMES = 2  # informative frames a video needs before it can match another
+# Orthonormal DCT-II matrix: dct(frame) = _DCT @ frame @ _DCT.T
+_DCT = np.sqrt(2 / SIZE) * np.cos(np.pi * np.arange(SIZE)[:, None] * (2 * np.arange(SIZE)[None, :] + 1) / (2 * SIZE))
+_DCT[0] /= np.sqrt(2)
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(x):
+        return np.bitwise_count(x)
+else:  # NumPy < 2.0
+    _POP8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(x):
+        x = np.ascontiguousarray(x, dtype=np.uint64)
+        return _POP8[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+class PhashError(Exception):
+    """Frames could not be extracted from a video."""
+
+
+def ffmpeg_available(ffmpeg='ffmpeg'):
+    return shutil.which(ffmpeg) is not None
+
+
+def _duration(path, ffmpeg):
+    # ffprobe ships next to ffmpeg
+    folder, name = os.path.split(ffmpeg)
+    ffprobe = os.path.join(folder, name.replace('ffmpeg', 'ffprobe'))
+    out = subprocess.run(
+        [ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', path],
+        capture_output=True, text=True, timeout=60,
+    )
+    try:
+        return float(out.stdout.strip())
+    except ValueError:
+        raise PhashError(f'no duration for {path}: {out.stderr.strip()[:200]}') from None
+
+
+def extract_frames(path, count=4, ffmpeg='ffmpeg'):
+    """count SIZE x SIZE grayscale frames (a uint8 array) at evenly spaced points of the video."""
+    duration = _duration(path, ffmpeg)
+    frames = []
+    for i in range(count):
+        # Skip the very start and end, where intros and end cards differ between uploads
+        at = duration * (i + 1) / (count + 1)
+        out = subprocess.run(
+            [ffmpeg, '-v', 'error', '-ss', f'{at:.3f}', '-i', path, '-frames:v', '1',
+             '-vf', f'scale={SIZE}:{SIZE}:flags=area,format=gray', '-f', 'rawvideo', 'pipe:1'],
+            capture_output=True, timeout=60,
+        )
+        if len(out.stdout) == SIZE * SIZE:
+            frames.append(np.frombuffer(out.stdout, dtype=np.uint8).reshape(SIZE, SIZE))
+    if not frames:
+        raise PhashError(f'no frames extracted from {path}')
+    return np.stack(frames)
+
+
+def informative_frames(frames):
+    """frames without the near-uniform ones (black screens, fades, flat title cards)."""
+    return frames[frames.reshape(len(frames), -1).std(axis=1) >= MIN_STD]
+
+
+def frame_hashes(frames):
+    """64-bit pHash of each frame in a (n, SIZE, SIZE) array, as a uint64 array."""
+    if not len(frames):
+        return np.empty(0, dtype=np.uint64)
+    coeffs = _DCT @ frames.astype(np.float64) @ _DCT.T
+    low = coeffs[:, :8, :8].reshape(len(frames), 64)
+    # Median without the DC term, which only reflects overall brightness
+    bits = low > np.median(low[:, 1:], axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view('>u8').astype(np.uint64).ravel()
+
+
+def video_hashes(path, count=4, ffmpeg='ffmpeg'):
+    """Hashes of the informative frames of the video; may be shorter than count, or empty."""
+    return frame_hashes(informative_frames(extract_frames(path, count, ffmpeg)))
+
+
+def video_distance(a, b):
+    """Median over a's frames of the Hamming distance to b's closest frame."""
+    return int(np.median(popcount(a[:, None] ^ b[None, :]).min(axis=1)))
+
+
+class PhashIndex:
+    """
+    Frame hashes of every hashed video, searchable by Hamming distance.
+
+    Hashes live in one growable uint64 array with a parallel array of owner
+    positions, so a query scans the whole library with a few vectorised
+    operations. Videos with fewer than MIN_FRAMES hashes are neither
+    indexed nor matched. Used from one thread.
+    """
+
+    def __init__(self):
+        self.ids = []         # position -> video id
+        self.videos = {}      # video id -> its frame hashes
+        self._hashes = np.empty(1024, dtype=np.uint64)
+        self._owners = np.empty(1024, dtype=np.int64)
+        self._size = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, db_path):
+        index = cls()
+        conn = sqlite3.connect(db_path)
+        for vid, blob in conn.execute('SELECT id, hashes FROM video_phash'):
+            if blob:
+                index.add(vid, np.frombuffer(blob, dtype='<u8').astype(np.uint64))
+        conn.close()
+        return index
+
+    def add(self, vid, hashes):
+        if vid in self.videos or len(hashes) < MIN_FRAMES:
+            return
+        n = len(hashes)
+        if self._size + n > len(self._hashes):
+            capacity = max(2 * len(self._hashes), self._size + n)
+            self._hashes = np.resize(self._hashes, capacity)
+            self._owners = np.resize(self._owners, capacity)
+        self._hashes[self._size:self._size + n] = hashes
+        self._owners[self._size:self._size + n] = len(self.ids)
+        self._size += n
+        self.ids.append(vid)
+        self.videos[vid] = hashes
+
+    def query(self, hashes, max_distance=10):
+        """[(video id, distance)] of near duplicates of hashes, closest first."""
+        if len(hashes) < MIN_FRAMES:
+            return []
+        stored = self._hashes[:self._size]
+        near = popcount(stored[None, :] ^ hashes[:, None]) <= max_distance
+        candidates = np.unique(self._owners[:self._size][near.any(axis=0)])
+        matches = []
+        for owner in candidates:
+            vid = self.ids[owner]
+            distance = video_distance(hashes, self.videos[vid])
+            if distance <= max_distance:
+                matches.append((vid, distance))
+        return sorted(matches, key=lambda m: m[1])
+
+    def match(self, hashes, max_distance=10):
+        """Closest near duplicate as (video id, distance), or None."""
+        matches = self.query(hashes, max_distance)
+        return matches[0] if matches else None
+
+
+def save_video_phash(writer, vid, hashes, duplicate_of=None):
+    writer.execute(
+        'INSERT OR REPLACE INTO video_phash (id, hashes, duplicate_of, hashed_at) VALUES (?, ?, ?, ?)',
+        (vid, hashes.astype('<u8').tobytes(), duplicate_of, time.strftime('%Y-%m-%d %H:%M:%S')),
+    )
+
+
+def scan(db_path, frames=4, max_distance=10, ffmpeg='ffmpeg', workers=3):
+    """Hash every cataloged video without a hash, oldest first, recording near duplicates."""
+    if not ffmpeg_available(ffmpeg):
+        print(f'{ffmpeg} not found; install ffmpeg or set FFMPEG in config.ini')
+        return
+    conn = init_catalog(db_path)
+    todo = conn.execute(
+        'SELECT v.id, v.file_path FROM videos v LEFT JOIN video_phash p ON p.id = v.id '
+        'WHERE p.id IS NULL AND v.file_path IS NOT NULL ORDER BY v.downloaded_at'
+    ).fetchall()
+    conn.close()
+    index = PhashIndex.load(db_path)
+    print(f'{len(todo)} video(s) to hash, {len(index)} already indexed')
+
+    def work(row):
+        try:
+            return row[0], video_hashes(row[1], frames, ffmpeg)
+        except (PhashError, OSError, subprocess.SubprocessError) as e:
+            print('Could not hash', row[1], e)
+            return row[0], None
+
+    start = time.perf_counter()
+    hashed = duplicates = 0
+    writer = CatalogWriter(db_path, batch_size=200)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for vid, hashes in pool.map(work, todo):
+                if hashes is None:
+                    continue
+                match = index.match(hashes, max_distance)
+                if match:
+                    duplicates += 1
+                index.add(vid, hashes)
+                save_video_phash(writer, vid, hashes, match[0] if match else None)
+                hashed += 1
+    finally:
+        writer.close()
+    print(f'Hashed {hashed} video(s) in {time.perf_counter() - start:.1f}s: {duplicates} near duplicate(s)')
+
+
+def list_duplicates(db_path):
+    conn = init_catalog(db_path)
+    rows = conn.execute(
+        'SELECT p.id, v.title, v.file_path, p.duplicate_of, o.title, o.file_path FROM video_phash p '
+        'LEFT JOIN videos v ON v.id = p.id LEFT JOIN videos o ON o.id = p.duplicate_of '
+        'WHERE p.duplicate_of IS NOT NULL ORDER BY p.duplicate_of'
+    ).fetchall()
+    conn.close()
+    for vid, title, path, original, original_title, original_path in rows:
+        print(f'{vid}  {title or ""}\n    {path}\n  near duplicate of {original}  {original_title or ""}\n    '
+              f'{original_path}')
+    print(f'{len(rows)} near duplicate(s)')
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Perceptual hashes and near-duplicate videos.')
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('scan', help='hash cataloged videos that have no hash yet')
+    sub.add_parser('dupes', help='list near duplicates')
+    args = parser.parse_args()
+
+    if args.command == 'scan':
+        scan(args.db, settings.phash_frames, settings.phash_max_distance, settings.ffmpeg, settings.download_workers)
+    else:
+        list_duplicates(args.db)
+
+
+if __name__ == '__main__':
+    main()
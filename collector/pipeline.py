@@ -0,0 +1,390 @@
+"""The per-video pipeline shared by every source.
+
+run() asks a Source for its collections, drops videos already in history
+and earlier failures that are quarantined or still backing off, then
+downloads, verifies, stores and catalogs the rest on the download engine
+while AI tagging runs in the background. With dry_run it stops after
+working out what would be downloaded, without touching the download tree.
+
+Each stage is timed into the run's RunMetrics, and the report is printed
+and stored in the catalog (run_reports) when the run ends.
+
+A PipelineState holds what a run opens once: the catalog writer, history,
+failure store, yt-dlp session, content store and perceptual hash index. run() makes its own, or
+reuses one passed in so a long-running process (collector.daemon) stays warm
+between runs.
+
+yt-dlp, the AI tagging stack and tqdm are only imported once a real run
+starts, so --dry-run and --help come up quickly.
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import time
+
+from .catalog import (CatalogWriter, connect, init_catalog, load_priorities, record_video, save_run_report,
+                      split_tags, update_video_tags)
+from .content_store import ContentStore, link_or_copy
+from .download_engine import DownloadEngine, DownloadJob, DownloaderSession
+from .failures import FailureStore
+from .history_store import HistoryStore
+from .integrity import sweep_partials, verify_download
+from .layout import FolderLayout
+from .metrics import RunMetrics, format_report
+from .sources import SourceError
+from .video_ids import ShortLinkCache, resolve_video_ids
+
+
+def plan_jobs(settings, collections, history, short_links, failures=None):
+    """
+    DownloadJobs for every video in collections that is not in history yet.
+
+    Each job's folder comes from the FolderLayout (collection / month shard).
+    With a FailureStore, videos that are quarantined or not due for a retry
+    are left out too. Returns (jobs, {'quarantined': n, 'backoff': n}).
+    """
+    layout = FolderLayout(settings.base_dir, settings.max_per_folder)
+    jobs = []
+    skipped = {'quarantined': 0, 'backoff': 0}
+    now = time.time()
+    for col_name, videos in collections.items():
+        print(f"\nFound {len(videos)} videos in '{col_name}'")
+        for url, vid in zip(videos, resolve_video_ids(videos, short_links)):
+            if not vid:
+                continue
+            if vid in history:
+                continue
+            status = failures.status(vid, now) if failures is not None else 'due'
+            if status != 'due':
+                skipped[status] += 1
+                continue
+            jobs.append(DownloadJob(vid, url, col_name, layout.folder(col_name, vid)))
+    if skipped['quarantined'] or skipped['backoff']:
+        print(f"Skipping {skipped['quarantined']} quarantined and {skipped['backoff']} backing-off failed video(s) "
+              "(python -m collector.failures report)")
+    return jobs, skipped
+
+
+def order_jobs(settings, jobs, resume=()):
+    """
+    Put interrupted downloads first, then the highest download priorities
+    (see collector.analytics), keeping source order otherwise.
+    """
+    conn = connect(settings.catalog_db)
+    priority = load_priorities(conn)
+    conn.close()
+    jobs.sort(key=lambda job: (job.vid not in resume, -priority.get(job.vid, 0)))
+    return jobs
+
+
+def save_tags(writer, job, result, metrics):
+    """Tagging-stage callback: merge AI results into the metadata file and catalog."""
+    tags, title, summary, fingerprint = result
+    meta_path = os.path.join(job.folder, f"{job.vid}.metadata.json")
+    with metrics.stage('metadata'):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        meta.update(title=title, tags=tags, summary=summary)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    update_video_tags(writer, job.vid, title, tags, summary, fingerprint)
+
+
+def reuse_original(settings, state, path, check, original):
+    """
+    For a download that is a near duplicate of an already cataloged video,
+    return the original's (title, tags, summary, tag fingerprint), or None.
+    With PHASH_LINK_DUPLICATES the new file is replaced by a link to the
+    original's, so the clip is stored once.
+    """
+    state.writer.flush()  # the original may have been recorded earlier in this run
+    conn = connect(settings.catalog_db)
+    row = conn.execute('SELECT file_path, title, tags, summary, tag_fingerprint, file_size, sha256 FROM videos '
+                       'WHERE id = ?', (original,)).fetchone()
+    conn.close()
+    if row is None:
+        return None
+    original_path, title, tags, summary, fingerprint, file_size, sha256 = row
+    if settings.phash_link_duplicates and original_path and os.path.isfile(original_path):
+        # With the content store, path is a hardlink to its blob; drop the blob once nothing uses it
+        blob = state.store.blob_path(check['sha256'], os.path.splitext(path)[1])
+        was_hardlink = settings.use_content_store and not os.path.islink(path)
+        os.remove(path)
+        link_or_copy(original_path, path)
+        if was_hardlink and os.path.exists(blob) and os.stat(blob).st_nlink == 1:
+            os.remove(blob)
+        check.update(file_size=file_size, sha256=sha256)
+    return title or '', split_tags(tags or ''), summary or '', fingerprint
+
+
+def preview(settings, source):
+    """Report what a run would download, reading but never writing the download tree."""
+    init_catalog(settings.catalog_db).close()
+    history = HistoryStore(settings.catalog_db, legacy_json=settings.history_file, read_only=True)
+    short_links = ShortLinkCache(settings.catalog_db, offline=True)
+    failures = FailureStore(settings.catalog_db)
+    try:
+        try:
+            collections = source.collections(history)
+        except SourceError as e:
+            print(e)
+            return []
+        jobs, _skipped = plan_jobs(settings, collections, history, short_links, failures)
+        order_jobs(settings, jobs)
+    finally:
+        failures.close()
+        short_links.close()
+        history.close()
+        source.close()
+    for job in jobs[:20]:
+        print(f'  {job.collection}: {job.url}')
+    if len(jobs) > 20:
+        print(f'  ... and {len(jobs) - 20} more')
+    print(f'\nDry run: {len(jobs)} video(s) would be downloaded')
+    return jobs
+
+
+class PipelineState:
+    """Everything a run opens once, kept open between runs by a long-running process."""
+
+    def __init__(self, settings):
+        os.makedirs(settings.base_dir, exist_ok=True)
+        init_catalog(settings.catalog_db).close()
+        self.writer = CatalogWriter(settings.catalog_db, settings.catalog_batch_size, settings.catalog_flush_secs)
+        self.history = HistoryStore(settings.catalog_db, legacy_json=settings.history_file, writer=self.writer)
+        self.failures = FailureStore(settings.catalog_db, self.writer, settings.failure_retry_hours,
+                                     settings.failure_max_attempts)
+        # One yt-dlp session reused for every download
+        self.downloader = DownloaderSession()
+        self.store = ContentStore(os.path.join(settings.base_dir, '.store'))
+        # Perceptual hashes of the library, when ffmpeg is there to extract frames
+        self.phash = None
+        if settings.use_phash:
+            from .phash import PhashIndex, ffmpeg_available
+
+            if ffmpeg_available(settings.ffmpeg):
+                self.phash = PhashIndex.load(settings.catalog_db)
+            else:
+                print(f'{settings.ffmpeg} not found: near-duplicate detection is off (USE_PHASH = false hides this)')
+        self.metrics = None       # RunMetrics of the run in progress
+        self.tagger = None        # its TaggingPipeline, while AI tagging is on
+        self.last_report = None   # report of the last finished run
+
+    def close(self):
+        self.downloader.close()
+        self.failures.close()
+        self.history.close()
+        self.writer.close()
+
+
+def run(settings, source, dry_run=False, state=None, stop=None):
+    """
+    Collect everything new from source; returns the number of new downloads.
+
+    state is a PipelineState to reuse (it is left open); stop is a
+    threading.Event that ends the run early once in-flight downloads finish.
+    """
+    if dry_run:
+        preview(settings, source)
+        return 0
+
+    from tqdm import tqdm
+    from .ai_tagging import tag_videos
+    from .tagging_pipeline import TaggingPipeline
+
+    metrics = RunMetrics(source.name)
+    owned = state is None
+    if owned:
+        state = PipelineState(settings)
+    else:
+        # Retry schedules may have been changed (collector.failures retry) since the last run
+        state.failures.reload()
+    state.metrics = state.writer.metrics = metrics
+    writer, history, failures = state.writer, state.history, state.failures
+    downloader, store, phash_index = state.downloader, state.store, state.phash
+    if phash_index is not None:
+        from .phash import PhashError, save_video_phash, video_hashes
+    # Clear leftovers from finished videos; keep the rest to resume first
+    resume = sweep_partials(settings.base_dir, history, settings.partial_max_age_days)
+
+    try:
+        with metrics.stage('collect'):
+            collections = source.collections(history)
+    except SourceError as e:
+        print(e)
+        source.close()
+        if owned:
+            state.close()
+        return 0
+
+    short_links = ShortLinkCache(settings.catalog_db)
+    with metrics.stage('dedupe'):
+        jobs, skipped = plan_jobs(settings, collections, history, short_links, failures)
+    short_links.close()
+    metrics.count('links', sum(len(videos) for videos in collections.values()))
+    metrics.count('queued', len(jobs))
+    metrics.count('skipped_quarantined', skipped['quarantined'])
+    metrics.count('skipped_backoff', skipped['backoff'])
+    for folder in {job.folder for job in jobs}:
+        os.makedirs(folder, exist_ok=True)
+    order_jobs(settings, jobs, resume)
+
+    def process_video(job):
+        """Worker-thread half of the pipeline: download and verify the file."""
+        with metrics.stage('download'):
+            path, expected_size = downloader.download(job.url, job.folder)
+        with metrics.stage('verify'):
+            check = verify_download(path, expected_size)
+        if settings.use_content_store:
+            # Keep one copy per distinct file; the collection gets a link to it
+            with metrics.stage('store'):
+                store.ingest(path, check['sha256'])
+        hashes = None
+        if phash_index is not None:
+            with metrics.stage('phash'):
+                try:
+                    hashes = video_hashes(path, settings.phash_frames, settings.ffmpeg)
+                except (PhashError, OSError, subprocess.SubprocessError) as e:
+                    print('Could not hash', path, e)
+        return path, check, hashes
+
+    total_new = 0
+    # Failures that will be retried later, including ones backing off from earlier runs
+    retryable = skipped['backoff']
+    progress = tqdm(total=len(jobs), desc='Processing')
+
+    def record(job, result, error):
+        progress.update(1)
+        action = 'download'
+        if error is None:
+            try:
+                record_download(job, result)
+                return
+            except Exception as e:
+                # One video that cannot be filed (a locked file, a full disk) must not end the run
+                action, error = 'record', e
+        record_failure(job, error, action)
+
+    def record_failure(job, error, action):
+        nonlocal retryable
+        error_class, quarantined = failures.record(job.vid, job.url, job.collection, error)
+        metrics.count('failed')
+        metrics.count(f'failed_{error_class}')
+        if quarantined:
+            metrics.count('quarantined')
+        else:
+            retryable += 1
+        print(f'Failed to {action}', job.url, f"[{error_class}{', quarantined' if quarantined else ''}]", error)
+
+    def record_download(job, result):
+        nonlocal total_new
+        path, check, hashes = result
+        tags, title, summary = [], '', ''
+        fingerprint = duplicate_of = None
+        if hashes is not None:
+            match = phash_index.match(hashes, settings.phash_max_distance)
+            phash_index.add(job.vid, hashes)
+            if match:
+                duplicate_of = match[0]
+                metrics.count('near_duplicates')
+                original = reuse_original(settings, state, path, check, duplicate_of)
+                if original and original[1]:
+                    title, tags, summary, fingerprint = original
+                print(f'{job.vid} is a near duplicate of {duplicate_of} (distance {match[1]})'
+                      + (', reusing its tags' if tags else ''))
+
+        # Save metadata next to files
+        meta = {
+            'id': job.vid,
+            'collection': job.collection,
+            'url': job.url,
+            'title': title,
+            'tags': tags,
+            'summary': summary,
+            'downloaded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'file': os.path.basename(path),
+            **check,
+        }
+        if duplicate_of:
+            meta['duplicate_of'] = duplicate_of
+
+        with metrics.stage('metadata'):
+            with open(os.path.join(job.folder, f"{job.vid}.metadata.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+
+        # Catalog row, tag links and history entry commit together
+        with writer.group():
+            with metrics.stage('catalog'):
+                record_video(writer, job.vid, job.collection, path, title, tags, summary, meta['downloaded_at'],
+                             url=job.url, **check)
+                if tags:
+                    update_video_tags(writer, job.vid, title, tags, summary, fingerprint)
+                if hashes is not None:
+                    save_video_phash(writer, job.vid, hashes, duplicate_of)
+            with metrics.stage('history'):
+                history.add(job.vid, job.collection)
+                failures.clear(job.vid)
+
+        total_new += 1
+        metrics.count('videos')
+        metrics.count('bytes', check.get('file_size') or 0)
+
+        # AI tagging (optional) runs in the background and fills these in later;
+        # near duplicates that took their original's tags skip it
+        if tagger is not None and not tags:
+            tagger.submit(job, job.url)
+
+    def tag_batch(texts):
+        with metrics.stage('tag'):
+            results = tag_videos(texts)
+        metrics.count('tagged', len(texts))
+        return results
+
+    tagger = None
+    if settings.use_ai:
+        tagger = TaggingPipeline(
+            tag_batch, lambda job, result: save_tags(writer, job, result, metrics),
+            settings.tagging_concurrency, settings.tagging_batch_size)
+        state.tagger = tagger
+
+    engine = DownloadEngine(settings.download_workers, settings.download_host_interval)
+    status = 'failed'
+    try:
+        engine.run(jobs, process_video, record, stop)
+        status = 'stopped' if stop is not None and stop.is_set() else 'completed'
+    except KeyboardInterrupt:
+        status = 'interrupted'
+        raise
+    finally:
+        progress.close()
+        if tagger is not None:
+            print('Waiting for AI tagging to finish...')
+            with metrics.stage('tag_drain'):
+                tagger.close()
+            state.tagger = None
+        source.close()
+        close_error = None
+        try:
+            if owned:
+                state.close()
+            else:
+                writer.metrics = None
+                writer.flush()
+        except (sqlite3.Error, RuntimeError) as e:
+            # Raised once the report is saved, so a failed run still leaves one
+            close_error = e
+            status = 'failed'
+        report = state.last_report = metrics.report(status, **(source.stats() or {}))
+        state.metrics = None
+        conn = connect(settings.catalog_db)
+        save_run_report(conn, report)
+        conn.close()
+        print()
+        print(format_report(report))
+        if close_error is not None:
+            raise close_error
+
+    source.finish(complete=status == 'completed' and not retryable)
+    print(f'\nDone. New downloads: {total_new}')
+    return total_new
@@ -0,0 +1,135 @@
+"""Where video links come from.
+
+A source turns its input (a data export, the official API, ...) into
+{collection name: [url, ...]}; everything after that -- id resolution,
+history, downloads, catalog and tagging -- is shared in pipeline.run().
+Adding a source means subclassing Source, nothing else.
+"""
+import os
+import sqlite3
+
+from .catalog import connect, load_sync_state, save_sync_state
+from .export_reader import load_export_index
+from .video_ids import ShortLinkCache, canonical_video_id
+
+
+class SourceError(Exception):
+    """The source could not produce a list of videos; the run stops cleanly."""
+
+
+class Source:
+    """Base class for link sources."""
+
+    name = 'source'
+
+    def collections(self, history):
+        """Return {collection name: [url, ...]}; history holds the downloaded ids."""
+        raise NotImplementedError
+
+    def finish(self, complete):
+        """
+        Called after a real run; complete is True unless some download failed
+        (or is backing off from an earlier failure) and will be retried.
+        Quarantined videos do not count: they are never retried.
+        """
+
+    def stats(self):
+        """Extra figures for the run report (e.g. API latency), or None."""
+        return None
+
+    def close(self):
+        pass
+
+
+class ExportSource(Source):
+    """
+    Links from TikTok's "Download your data" export JSON, one collection per
+    export section (Watch History, Share History, Like List, ...).
+    """
+
+    name = 'export'
+
+    def __init__(self, settings):
+        self.export_path = settings.export_json
+        self.catalog_db = settings.catalog_db
+
+    def collections(self, history):
+        """
+        Read TikTok's official user data export JSON and pull out all video links.
+
+        Links already indexed from earlier exports are kept, so videos that
+        failed to download are still offered again after the export is replaced.
+        """
+        if not os.path.exists(self.export_path):
+            raise SourceError(
+                f"Export JSON not found: {self.export_path}. Put your TikTok export JSON there "
+                "or update EXPORT_JSON in config.ini."
+            )
+
+        # Links are cached in the catalog; the export is only re-parsed when it changed
+        conn = sqlite3.connect(self.catalog_db)
+        short_links = ShortLinkCache(self.catalog_db)
+        try:
+            links, stats = load_export_index(conn, self.export_path,
+                                             lambda url: canonical_video_id(url, short_links))
+        finally:
+            short_links.close()
+            conn.close()
+        print(
+            f"Export index {'hit' if stats['hit'] else 'miss'}: {len(links)} links "
+            f"({stats['new']} new) loaded in {stats['seconds'] * 1000:.0f} ms"
+        )
+        collections = {}
+        for _vid, url, _date, section in links:
+            collections.setdefault(section or 'Export', []).append(url)
+        return collections
+
+
+class OfficialApiSource(Source):
+    """Saved videos from TikTok's official API, as one 'Saved' collection."""
+
+    name = 'official_api'
+    # Key of this source's high-water mark in the catalog's sync_state table
+    sync_key = 'official_api_favorites'
+
+    def __init__(self, settings, full_resync=False):
+        from .official_api import OfficialApi
+
+        self.catalog_db = settings.catalog_db
+        self.full_resync = full_resync
+        self.api = OfficialApi(settings)
+        self.newest = None
+
+    def collections(self, history):
+        conn = connect(self.catalog_db)
+        since = None if self.full_resync else load_sync_state(conn, self.sync_key)
+        conn.close()
+        try:
+            access_token = self.api.authorize()
+            videos, self.newest = self.api.fetch_saved_videos(
+                access_token, known=() if self.full_resync else history, since=since)
+        except Exception as e:
+            raise SourceError(
+                f"Error fetching videos: {e}\n"
+                "\nTroubleshooting:\n"
+                "1. Make sure TIKTOK_CLIENT_KEY and TIKTOK_CLIENT_SECRET are set in config.ini\n"
+                "2. Register your app at https://developers.tiktok.com/\n"
+                "3. Add 'Data Portability API' product to your app\n"
+                "4. Set TIKTOK_REDIRECT_URI to match your app's redirect URI"
+            ) from e
+        return {"Saved": list(dict.fromkeys(videos))}
+
+    def finish(self, complete):
+        # Only move the cursor past videos that are all safely downloaded;
+        # otherwise the next run pages back far enough to retry the failures
+        if self.newest and complete:
+            conn = connect(self.catalog_db)
+            save_sync_state(conn, self.sync_key, *self.newest)
+            conn.close()
+
+    def stats(self):
+        return {'api': self.api.api.stats.summary()}
+
+    def close(self):
+        print(f'API: {self.api.api.stats}')
+        self.api.close()
@@ -0,0 +1,196 @@
+"""Background AI tagging stage, decoupled from downloads.
+
+Downloaded videos are submitted to a bounded asyncio queue served by a few
+worker coroutines on their own event loop thread. Each worker gathers up to
+`batch_size` videos into one tagging request, retries with exponential
+backoff when the API rate-limits, and hands each result to `on_result`.
+
+`python -m collector.tagging_pipeline retag` re-tags catalog rows whose tags
+are missing or were produced by a different model/prompt/taxonomy, or by the
+local keyword tagger once LOCAL_TAGGER_FIRST is off; anything the tag cache
+already holds is filled in without an API call.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+from .ai_tagging import LOCAL_FINGERPRINT, LOCAL_TAGGER_FIRST, TAG_FINGERPRINT, RateLimited, tag_videos
+from .catalog import CatalogWriter, init_catalog, update_video_tags
+from .config import Settings
+from .export_reader import init_export_index
+
+
+class TaggingPipeline:
+    """
+    Tag items in the background with `tag_batch(inputs) -> [result, ...]`.
+
+    submit(item, text) returns as soon as the item is queued; it only waits
+    when `max_queue` items are already pending. on_result(item, result) is
+    called from the pipeline thread, so it must be thread-safe.
+    """
+
+    def __init__(self, tag_batch, on_result, concurrency=2, batch_size=5,
+                 batch_wait=1.0, max_queue=1000, max_retries=5, backoff=2.0):
+        self.tag_batch = tag_batch
+        self.on_result = on_result
+        self.concurrency = max(1, int(concurrency))
+        self.batch_size = max(1, int(batch_size))
+        self.batch_wait = batch_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._loop = asyncio.new_event_loop()
+        self._queue = None
+        self._workers = []
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(max_queue,), name='tagging', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self, max_queue):
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._workers = [self._loop.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def submit(self, item, text):
+        asyncio.run_coroutine_threadsafe(self._queue.put((item, text)), self._loop).result()
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def close(self):
+        """Wait for everything submitted so far to be tagged, then stop."""
+        asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _drain(self):
+        await self._queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _tag_with_retry(self, texts):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(self.tag_batch, texts)
+            except RateLimited as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = e.retry_after or self.backoff * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                results = await self._tag_with_retry([text for _item, text in batch])
+                for (item, _text), result in zip(batch, results):
+                    try:
+                        self.on_result(item, result)
+                    except Exception as e:
+                        print('Saving tags failed:', e)
+            except Exception as e:
+                print('AI tagging failed:', e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def videos_needing_tags(conn, include_stale=True):
+    """Yield (id, url, file_path) for rows with no tags, or stale ones."""
+    init_export_index(conn)
+    where = "COALESCE(v.tags, '') = ''"
+    params = ()
+    if include_stale:
+        # Local keyword tags stay current only while the local tagger runs first
+        current = (TAG_FINGERPRINT, LOCAL_FINGERPRINT) if LOCAL_TAGGER_FIRST else (TAG_FINGERPRINT,)
+        where += f" OR COALESCE(v.tag_fingerprint, '') NOT IN ({', '.join('?' * len(current))})"
+        params = current
+    rows = conn.execute(
+        'SELECT v.id, COALESCE(v.url, e.url), v.file_path FROM videos v '
+        'LEFT JOIN export_links e ON e.id = v.id WHERE ' + where,
+        params,
+    )
+    for vid, url, file_path in rows:
+        yield vid, url or f'https://www.tiktokv.com/share/video/{vid}/', file_path
+
+
+def retag(db_path, include_stale=True, concurrency=2, batch_size=5):
+    conn = init_catalog(db_path)
+    todo = list(videos_needing_tags(conn, include_stale))
+    conn.close()
+    print(f'{len(todo)} video(s) need tags ({TAG_FINGERPRINT})')
+    if not todo:
+        return
+
+    writer = CatalogWriter(db_path)
+    done = 0
+    lock = threading.Lock()
+
+    def save(item, result):
+        nonlocal done
+        vid, _url, file_path = item
+        tags, title, summary, fingerprint = result
+        # file_path is the video file; rows from older versions hold its folder
+        folder = file_path if file_path and os.path.isdir(file_path) else os.path.dirname(file_path or '')
+        meta_path = os.path.join(folder, f'{vid}.metadata.json')
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            meta.update(title=title, tags=tags, summary=summary)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+        update_video_tags(writer, vid, title, tags, summary, fingerprint)
+        with lock:
+            done += 1
+
+    start = time.perf_counter()
+    pipeline = TaggingPipeline(tag_videos, save, concurrency, batch_size)
+    try:
+        for item in todo:
+            pipeline.submit(item, item[1])
+    finally:
+        pipeline.close()
+        writer.close()
+    print(f'Re-tagged {done} video(s) in {time.perf_counter() - start:.1f}s')
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Background AI tagging tools.')
+    parser.add_argument('--db', default=settings.catalog_db)
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('retag', help='tag videos whose tags are missing or stale')
+    cmd.add_argument('--missing-only', action='store_true', help='skip rows that already have tags')
+    args = parser.parse_args()
+
+    retag(
+        args.db,
+        include_stale=not args.missing_only,
+        concurrency=settings.tagging_concurrency,
+        batch_size=settings.tagging_batch_size,
+    )
+
+
+if __name__ == '__main__':
+    main()
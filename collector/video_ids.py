@@ -0,0 +1,199 @@
+"""Canonical TikTok video id resolution.
+
+Every link shape seen in exports and the API maps onto the numeric video id:
+
+    https://www.tiktokv.com/share/video/7527707383221521686/
+    https://www.tiktok.com/@lady.justice91/video/7551772002869185815?lang=en
+    https://m.tiktok.com/v/7551772002869185815.html
+    https://www.tiktok.com/embed/v2/7551772002869185815
+    https://www.tiktok.com/foo?item_id=7551772002869185815
+    https://vm.tiktok.com/ZMabc123/   (short link: resolved once, then cached)
+
+Links that do not point at a video (foryou, search, profile pages) give None.
+
+    python -m collector.video_ids check [export.json]   # run the URL corpus and summarise an export
+"""
+import argparse
+import collections
+import re
+import sqlite3
+import time
+
+# Bump whenever the link shapes below change, so cached export indexes are rebuilt
+RESOLVER_VERSION = 2
+
+_ID = r'(\d{15,20})'
+VIDEO_URL = re.compile(
+    r'(?:/(?:share/)?video/|/v/|/embed/(?:v2/)?|/photo/|[?&](?:share_)?item_id=)' + _ID + r'(?!\d)',
+    re.IGNORECASE,
+)
+SHORT_URL = re.compile(
+    r'^(?:https?://)?(?:(?:vm|vt)\.tiktok\.com/|(?:www\.|m\.)?tiktok\.com/t/)([A-Za-z0-9]+)',
+    re.IGNORECASE,
+)
+
+# (url, expected id) for every link shape we handle; `check` runs these
+URL_CORPUS = [
+    ('https://www.tiktokv.com/share/video/7527707383221521686/', '7527707383221521686'),
+    ('https://www.tiktokv.com/share/video/7527707383221521686', '7527707383221521686'),
+    ('https://www.tiktokv.com/share/video/7527707383221521686/?u_code=abc', '7527707383221521686'),
+    ('https://www.tiktok.com/@lady.justice91/video/7551772002869185815', '7551772002869185815'),
+    ('https://www.tiktok.com/@lady.justice91/video/7551772002869185815/', '7551772002869185815'),
+    ('https://www.tiktok.com/@user/video/7551772002869185815?is_from_webapp=1&lang=en', '7551772002869185815'),
+    ('https://www.tiktok.com/@user.name_1/photo/7551772002869185815', '7551772002869185815'),
+    ('https://m.tiktok.com/v/7551772002869185815.html', '7551772002869185815'),
+    ('https://www.tiktok.com/embed/v2/7551772002869185815', '7551772002869185815'),
+    ('https://www.tiktok.com/embed/7551772002869185815', '7551772002869185815'),
+    ('https://www.tiktok.com/share/video/7551772002869185815', '7551772002869185815'),
+    ('https://www.tiktok.com/foo?item_id=7551772002869185815&x=1', '7551772002869185815'),
+    ('https://www.tiktok.com/foryou?lang=en-GB', None),
+    ('https://www.tiktok.com/search?q=morpheus_17&t=1752663965767', None),
+    ('https://www.tiktok.com/', None),
+    ('https://www.tiktok.com/@lady.justice91', None),
+    ('', None),
+]
+
+# (url, short code) for links that need one redirect to find the id
+SHORT_LINK_CORPUS = [
+    ('https://vm.tiktok.com/ZMabc123/', 'ZMabc123'),
+    ('https://vt.tiktok.com/ZSxyz789/', 'ZSxyz789'),
+    ('https://www.tiktok.com/t/ZTRabc12/', 'ZTRabc12'),
+    ('vm.tiktok.com/ZMabc123', 'ZMabc123'),
+    ('https://www.tiktok.com/tag/carp', None),
+]
+
+
+def short_code(url):
+    m = SHORT_URL.search(url.strip())
+    return m.group(1) if m else None
+
+
+def parse_video_id(url):
+    """The id if it can be read from the URL itself, else None."""
+    m = VIDEO_URL.search(url or '')
+    return m.group(1) if m else None
+
+
+def looks_like_video_link(url):
+    return bool(url) and (VIDEO_URL.search(url) is not None or SHORT_URL.search(url.strip()) is not None)
+
+
+class ShortLinkCache:
+    """Short-link code -> video id, resolved over HTTP once and kept in the catalog."""
+
+    def __init__(self, db_path, offline=False):
+        self.offline = offline
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS short_links (
+                code TEXT PRIMARY KEY,
+                video_id TEXT,
+                resolved_at TEXT
+            )
+        ''')
+        self.conn.commit()
+        self._known = dict(self.conn.execute('SELECT code, video_id FROM short_links'))
+        self._session = None
+
+    def _follow(self, code, url):
+        import requests
+
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers['User-Agent'] = 'Mozilla/5.0'
+        if not url.startswith('http'):
+            url = 'https://' + url
+        try:
+            with self._session.get(url, allow_redirects=True, stream=True, timeout=10) as resp:
+                return parse_video_id(resp.url)
+        except requests.RequestException as e:
+            print('Could not resolve short link', url, e)
+            return None
+
+    def lookup(self, url):
+        code = short_code(url)
+        if code is None:
+            return None
+        if code in self._known or self.offline:
+            return self._known.get(code)
+        vid = self._follow(code, url)
+        if vid:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO short_links (code, video_id, resolved_at) VALUES (?, ?, ?)',
+                    (code, vid, time.strftime('%Y-%m-%d %H:%M:%S')),
+                )
+            self._known[code] = vid
+        return vid
+
+    def close(self):
+        self.conn.close()
+        if self._session is not None:
+            self._session.close()
+
+
+def canonical_video_id(url, short_links=None):
+    """Resolve one URL to its video id; short links need a ShortLinkCache."""
+    vid = parse_video_id(url)
+    if vid is None and url and short_links is not None:
+        vid = short_links.lookup(url)
+    return vid
+
+
+def resolve_video_ids(urls, short_links=None):
+    """
+    Resolve many URLs in one pass; returns ids aligned with urls.
+
+    Each distinct URL is matched once, and short links are only followed for
+    codes that are not cached yet.
+    """
+    resolved = {}
+    for url in set(urls):
+        resolved[url] = canonical_video_id(url, short_links)
+    return [resolved[url] for url in urls]
+
+
+def check(export_path=None):
+    failures = 0
+    for url, expected in URL_CORPUS:
+        got = parse_video_id(url)
+        if got != expected:
+            failures += 1
+            print(f'FAIL {url!r}: expected {expected}, got {got}')
+    for url, expected in SHORT_LINK_CORPUS:
+        got = short_code(url)
+        if got != expected:
+            failures += 1
+            print(f'FAIL {url!r}: expected short code {expected}, got {got}')
+    total = len(URL_CORPUS) + len(SHORT_LINK_CORPUS)
+    print(f'URL corpus: {total - failures}/{total} passed')
+
+    if export_path:
+        from .export_reader import iter_export_links
+
+        shapes = collections.Counter()
+        start = time.perf_counter()
+        links = [url for _vid, url, _date, _section in iter_export_links(
+            export_path, lambda u: u, dedupe=False, video_only=False)]
+        ids = resolve_video_ids(links)
+        for url, vid in zip(links, ids):
+            shape = re.sub(r'\d{6,}', '<id>', re.sub(r'\?.*', '?...', url))
+            shapes[(shape, vid is not None)] += 1
+        print(f'{len(links)} links, {len(set(filter(None, ids)))} distinct videos '
+              f'in {time.perf_counter() - start:.2f}s')
+        for (shape, ok), count in shapes.most_common():
+            print(f'  {count:>7}  {"id " if ok else "-- "} {shape}')
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TikTok video id resolution.')
+    sub = parser.add_subparsers(dest='command', required=True)
+    cmd = sub.add_parser('check', help='run the URL corpus, optionally against an export')
+    cmd.add_argument('export', nargs='?', default=None)
+    args = parser.parse_args()
+    raise SystemExit(0 if check(args.export) else 1)
+
+
+if __name__ == '__main__':
+    main()